@@ -6,13 +6,75 @@ import os
 class Settings(BaseSettings):
     qdrant_host: str = "qdrant"
     qdrant_port: int = 6333
+    qdrant_quantization: str = ""  # "scalar" (int8), "binary" or "" for none; quantized vectors are kept in RAM
+    qdrant_vectors_on_disk: bool = False  # Keep original vectors on disk, worth it with quantization
+    qdrant_quantization_rescore: bool = True  # Rescore quantized candidates with the original vectors
+    qdrant_quantization_oversampling: float = 2.0  # Candidates fetched per result before rescoring
     embedding_model: str = "cointegrated/LaBSE-en-ru"
     web_url: str = os.getenv("WEB_URL", "http://localhost:8080")
     secret_key: str = os.getenv("", "somerandomkey")
     deepseek_api_key: str = os.getenv("DEEPSEEK_API_KEY", "")
     deepseek_api_url: str = "https://api.deepseek.com/v1/chat/completions"
+    deepseek_timeout: float = 20.0  # Seconds per request
+    deepseek_connect_timeout: float = 5.0
+    deepseek_max_connections: int = 10
+    deepseek_max_attempts: int = 3  # Hedged attempts per course selection
+    deepseek_hedge_delay: float = 8.0  # Seconds before a hedged attempt, until p95 of real latencies is known
+    deepseek_breaker_failures: int = 5  # Consecutive failures that open the circuit breaker
+    deepseek_breaker_reset: float = 60.0  # Seconds the breaker stays open
+    deepseek_stream: bool = True  # Stream completions, needed to measure time to first token
+    search_mode: str = "fanout"  # "fanout": one sub-query per desired skill fused with RRF, "single": one query
+    search_max_subqueries: int = 5  # Desired skills searched separately in "fanout" mode
+    search_hybrid: bool = True  # Fuse BM25 hits over title, summary and skills into the dense search
+    stream_candidates: int = 10  # Courses in the first "candidates" event of /api/courses/roadmaps/stream
+    llm_selection_timeout: float = 25.0  # Seconds for LLM course selection before the local fallback
+    llm_prompt_max_tokens: int = 3000  # Estimated size the course selection prompt is fitted into
+    llm_summary_tokens: int = 60  # Course title and summary are cut to this many tokens in the prompt
+    llm_max_candidates: int = 30  # Most relevant courses listed in the prompt
+    selection_cache_size: int = 512  # LLM course selections kept, 0 disables the cache
+    selection_cache_ttl: float = 24 * 3600  # Seconds
+    selection_cache_similarity: float = 0.97  # Min cosine similarity of query embeddings to reuse a selection, 0 disables
+    selection_cache_dir: str = ""  # Directory of the on-disk copy, empty disables it
     similarity_threshold: float = 0  # Lowered from 0.7 to 0.6 for better course matching
     load_courses: str = "false"
+    stepik_api_url: str = "https://stepik.org/api"
+    stepik_http2: bool = True
+    stepik_timeout: float = 30.0
+    stepik_max_concurrency: int = 8  # Parallel requests to Stepik
+    stepik_rate_limit: float = 10.0  # Requests per second, 0 disables the limit
+    stepik_rate_burst: float = 10.0
+    stepik_max_retries: int = 4  # Retries on 429/5xx and connection errors
+    stepik_backoff_base: float = 0.5  # Seconds, doubled on every retry
+    popular_courses_refresh_interval: float = 600  # Seconds between background refreshes of /api/courses/popular
+    popular_courses_max_age: float = 1800  # Seconds after which a request triggers a refresh of a stale value
+    courses_sync_mode: str = "incremental"  # "incremental" re-encodes only changed courses, "full" re-encodes all
+    courses_sync_interval_hours: float = 24  # Periodic Stepik sync, 0 syncs only at startup
+    encode_batch_size: int = 32  # Texts per SentenceTransformer.encode call during ingestion
+    encode_sort_by_length: bool = True  # Bucket ingestion texts of similar length together
+    encode_micro_batching: bool = True  # Coalesce concurrent query encodes into one batch
+    encode_batch_window_ms: float = 2.0  # How long a query batch waits for more queries
+    encode_batch_max_size: int = 32  # Max queries per batched encode
+    encoder_backend: str = "torch"  # "torch", "onnx" or "onnx-int8" (ONNX Runtime on CPU, dynamically quantized)
+    encoder_threads: int = 0  # Intra-op threads of torch / ONNX Runtime, 0 keeps the library default
+    encoder_int8_config: str = "avx2"  # Instruction set of int8 quantization: "arm64", "avx2", "avx512" or "avx512_vnni"
+    embedding_dim: int = 0  # Reduce course and query embeddings to this many dimensions, 0 keeps the model's
+    embedding_reduction: str = "truncate"  # "truncate" (first dimensions) or "pca"
+    embedding_pca_path: str = "models/pca.npz"  # Principal components for "pca" reduction
+    embedding_cache_size: int = 2048  # Query embeddings kept in memory, 0 disables the cache
+    embedding_cache_ttl: float = 7 * 24 * 3600  # Seconds
+    embedding_cache_dir: str = ""  # Directory of the on-disk tier, empty disables it
+    embedding_cache_disk_size: int = 100000  # Query embeddings kept on disk
+    executor_inference_workers: int = 1  # Interactive model inference (query encoding)
+    executor_ingest_workers: int = 1  # Bulk encoding of the background course import
+    executor_io_workers: int = 4  # Blocking network calls (Qdrant)
+    db_pool_size: int = 10  # Connections kept open to Postgres
+    db_max_overflow: int = 20  # Extra connections opened under load
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Seconds after which a connection is replaced
+    write_behind: bool = False  # Save roadmaps and chat messages in the background, after the response
+    write_behind_queue_size: int = 1000  # Writes waiting to be saved; submitting waits while it is full
+    write_behind_batch_size: int = 50  # Writes saved in one transaction
+    write_behind_drain_timeout: float = 30.0  # Seconds to finish pending writes on shutdown
 
 
 settings = Settings()
@@ -1,49 +1,127 @@
-import langgraph
-from app.main import call_deepseek
+"""
+Multi-skill roadmap pipeline: goal -> skills and sub-skills (one LLM call) -> concurrent course
+searches for every sub-skill (embeddings encoded in one batch) -> local roadmap selection.
+
+Usage:
+    python -m app.graph
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services import deepseek, encoder, qdrant
+from app.services.qdrant import SEARCH_PAYLOAD_FIELDS
+from app.utils.ai_utils import call_deepseek
+from app.utils.course_filters import course_filter
+from app.utils.search import select_locally
+
+logger = logging.getLogger(__name__)
+
+MAX_SKILLS = 5
+MAX_SUBSKILLS = 3
+# Courses found per sub-skill query
+SEARCH_LIMIT = 20
+
+SKILLS_PROMPT = """Extract the main learning goals or skills from: '{text}'.
+For each of them list 2-3 important sub-skills.
+Return JSON like {{"skills": [{{"skill": "Python", "subskills": ["syntax", "OOP"]}}]}} and nothing else."""
 
 
 def get_user_input():
     user_input = input("What would you like to learn? ")
     return user_input
 
-def analyze_input(input_text):
-    prompt = f"Extract the main learning goals or skills from: '{input_text}'."
-    markers = call_deepseek(prompt)
-    print(f"Markers found: {markers}")
-    return markers
 
 def ask_for_missing_markers():
     clarification = input("Please clarify or add more details: ")
     return clarification
 
-def generate_subskill_prompts(markers):
-    prompt = f"For each of these skills: {markers}, list 2-3 important sub-skills."
-    subskills = call_deepseek(prompt)
-    print(f"Sub-skills: {subskills}")
-    return subskills
 
-def search_skills(prompts):
-    # For now, just echo the prompts
-    print(f"Searching for: {prompts}")
-    return prompts
+async def analyze_input(input_text: str) -> List[dict]:
+    """Skills and their sub-skills as [{"skill": ..., "subskills": [...]}]; empty if the LLM gave none."""
+    try:
+        answer = json.loads(await call_deepseek(SKILLS_PROMPT.format(text=input_text), json_mode=True))
+        skills = [
+            {
+                "skill": str(item["skill"]),
+                "subskills": [str(subskill) for subskill in item.get("subskills", [])][:MAX_SUBSKILLS],
+            }
+            for item in answer.get("skills", []) if item.get("skill")
+        ]
+    except Exception as e:
+        logger.warning(f"Could not extract skills: {e!r}")
+        return []
+    logger.info(f"Skills found: {skills}")
+    return skills[:MAX_SKILLS]
+
+
+def subskill_queries(skills: List[dict]) -> List[str]:
+    queries = []
+    for skill in skills:
+        for subskill in skill["subskills"] or [""]:
+            query = f"{skill['skill']} {subskill}".strip()
+            if query not in queries:
+                queries.append(query)
+    return queries
+
+
+async def search_skills(queries: List[str], hours: int, cost: int) -> List[list]:
+    """Search results of every query; queries are encoded together and searched concurrently."""
+    vectors = await encoder.vectorize_many(queries)
+    query_filter = course_filter(hours, cost)
+    return await asyncio.gather(*(
+        qdrant.search(vector, "courses", limit=SEARCH_LIMIT, query_filter=query_filter,
+                      with_payload=SEARCH_PAYLOAD_FIELDS)
+        for vector in vectors
+    ))
+
+
+def merge_results(results: List[list]) -> Tuple[List[dict], List[float]]:
+    """Courses found by any query with their best score, most similar first."""
+    best: Dict[int, tuple] = {}
+    for points in results:
+        for point in points:
+            if point.id not in best or best[point.id][1] < point.score:
+                best[point.id] = (point.payload, point.score)
+    ranked = sorted(best.values(), key=lambda pair: pair[1], reverse=True)
+    return [course for course, _ in ranked], [score for _, score in ranked]
+
+
+async def build_roadmap(input_text: str, hours: int, cost: int, skills: Optional[List[dict]] = None) -> dict:
+    """Roadmap for a free-form goal: {"skills": [...], "courses": [...]} with full course payloads."""
+    if skills is None:
+        skills = await analyze_input(input_text)
+    if not skills:
+        skills = [{"skill": input_text, "subskills": []}]
+    results = await search_skills(subskill_queries(skills), hours, cost)
+    courses, scores = merge_results(results)
+    chosen = await select_locally(courses, scores, hours, cost)
+    return {"skills": skills, "courses": await qdrant.hydrate(chosen)}
 
-def select_and_organize(skills):
-    # For now, just echo the skills
-    print(f"Selected skills: {skills}")
-    return skills
 
 def display_roadmap(roadmap):
     print("\n--- Your Learning Roadmap ---")
-    print(roadmap)
+    for skill in roadmap["skills"]:
+        print(f"{skill['skill']}: {', '.join(skill['subskills'])}")
+    for idx, course in enumerate(roadmap["courses"], 1):
+        print(f"{idx}. {course['title']} ({course['duration']} h, {course['price']} {course['currency_code']})")
+
 
-def main():
+async def main():
+    await encoder.initialize()
+    qdrant.initialize(settings.qdrant_host, settings.qdrant_port)
     user_input = get_user_input()
-    markers = analyze_input(user_input)
-    # Optionally, add logic to check if markers are missing and call ask_for_missing_markers()
-    subskills = generate_subskill_prompts(markers)
-    searched = search_skills(subskills)
-    selected = select_and_organize(searched)
-    display_roadmap(selected)
+    skills = await analyze_input(user_input)
+    if not skills:
+        user_input += " " + ask_for_missing_markers()
+        skills = await analyze_input(user_input)
+    roadmap = await build_roadmap(user_input, hours=1000, cost=100000, skills=skills)
+    display_roadmap(roadmap)
+    await encoder.close()
+    await deepseek.close()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
@@ -4,13 +4,17 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .routers import *
-from app.services import encoder, qdrant
+from app.services import encoder, qdrant, stepik, deepseek
 from app.config import settings
 
 from contextlib import asynccontextmanager
 from .config import setup_logging
 import logging
 from app.services import database
+from app.services.executor import shutdown_executors
+from app.services.popular import popular_courses
+from app.services.selection_cache import selection_cache
+from app.services.write_behind import write_behind
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -20,13 +24,29 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Load the ML model
     await encoder.initialize()
+    await stepik.start()
+    await deepseek.start()
+    selection_cache.load()
+    popular_courses.start()
     print("Connecting to qdrant", flush=True)
     qdrant.initialize(settings.qdrant_host, settings.qdrant_port)
-    database.Base.metadata.create_all(database.engine)
+    async with database.engine.begin() as conn:
+        await conn.run_sync(database.create_schema)
+    if settings.write_behind:
+        write_behind.start()
     # await qdrant.loadCourses()
-    app.state.courses_load_task = asyncio.create_task(qdrant.loadCourses())
+    app.state.courses_load_task = asyncio.create_task(qdrant.syncCourses())
     yield
     # Clean up the ML models and release the resources
+    app.state.courses_load_task.cancel()
+    await popular_courses.stop()
+    await encoder.close()
+    await stepik.close()
+    await deepseek.close()
+    selection_cache.flush()
+    await write_behind.stop(settings.write_behind_drain_timeout)
+    await database.engine.dispose()
+    shutdown_executors()
 
 
 app = FastAPI(
@@ -48,6 +68,7 @@ app.add_middleware(
 app.include_router(users.router)
 app.include_router(chats.router)
 app.include_router(courses.router)
+app.include_router(metrics.router)
 
 
 logger.info("Application started")
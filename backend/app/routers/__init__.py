@@ -1,3 +1,4 @@
 from .users import router
 from .courses import router
-from .chats import router
\ No newline at end of file
+from .chats import router
+from .metrics import router
\ No newline at end of file
@@ -1,27 +1,63 @@
-from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
 from app.routers.users import get_current_user
-from app.models.roadmap import Dialog, Message
-from app.schemas.roadmap import DialogSchema
-from app.services.database import session
+from app.models.roadmap import Dialog
+from app.schemas.roadmap import DialogSchema, DialogPage, MessagePage
+from app.services import chat_service
+from app.services.database import get_session
+from app.services.write_behind import write_behind
 from pydantic import BaseModel
-from sqlalchemy.orm import joinedload
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from functools import partial
+from typing import List, Optional
 
 
 router = APIRouter(prefix="/api")
 
-@router.get("/chats", tags=["chats"], response_model=List[DialogSchema], summary="Get user's chats")
-async def get_user_dialogs(current_user: str = Depends(get_current_user)):
-    dialogs = session.query(Dialog).options(joinedload(Dialog.messages)).filter(Dialog.owner == current_user).all()
-    return dialogs
+# Page size limits of the paginated chat endpoints
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+@router.get("/chats", tags=["chats"], response_model=List[DialogSchema], summary="Get user's chats",
+            deprecated=True, description="Loads every message of every chat, use /chats/summaries and /chats/{id}/messages")
+async def get_user_dialogs(current_user: str = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    result = await session.execute(
+        select(Dialog).options(selectinload(Dialog.messages)).filter(Dialog.owner == int(current_user))
+    )
+    return result.scalars().all()
+
+@router.get("/chats/summaries", tags=["chats"], response_model=DialogPage, summary="Get a page of user's chats")
+async def get_dialog_summaries(
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[int] = Query(None, description="next_cursor of the previous page"),
+    current_user: str = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    dialogs, next_cursor = await chat_service.dialog_page(session, int(current_user), limit, before)
+    return {"items": dialogs, "next_cursor": next_cursor}
+
+@router.get("/chats/{id}/messages", tags=["chats"], response_model=MessagePage, summary="Get a page of chat messages")
+async def get_dialog_messages(
+    id: int,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = Query(None, description="next_cursor of the previous page"),
+    current_user: str = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    dialog = await session.get(Dialog, id)
+    if dialog is None or dialog.owner != int(current_user):
+        raise HTTPException(status_code=404, detail="Dialog not found")
+    messages, next_cursor = await chat_service.message_page(session, id, limit, after)
+    return {"items": messages, "next_cursor": next_cursor}
 
 @router.post("/chats", tags=["chats"], response_model=dict, summary="Create chat")
-async def create_dialog(request: Request, current_user: str = Depends(get_current_user)):
-    new_dialog = Dialog(name="My way", owner=current_user)
+async def create_dialog(request: Request, current_user: str = Depends(get_current_user),
+                        session: AsyncSession = Depends(get_session)):
+    new_dialog = Dialog(name="My way", owner=int(current_user))
 
     session.add(new_dialog)
-    session.commit()
-    session.refresh(new_dialog)
+    await session.commit()
 
     return {"id": new_dialog.id}
     
@@ -34,24 +70,19 @@ async def save_message(
     id: int,
     request: SaveMessageRequest,
     current_user: int = Depends(get_current_user),  # Assuming current_user returns user ID
+    session: AsyncSession = Depends(get_session),
 ):
-    # Check if the dialog exists
-    dialog = session.query(Dialog).options(joinedload(Dialog.messages)).filter(Dialog.id == id).first()
-    if not dialog:
-        raise HTTPException(status_code=404, detail="Dialog not found")
+    if write_behind.running:
+        # Check if the dialog exists, the message itself is saved after the response
+        if await session.get(Dialog, id) is None:
+            raise HTTPException(status_code=404, detail="Dialog not found")
+        await write_behind.submit(partial(chat_service.add_message, dialog_id=id, text=request.message))
+        return {"message": "Message accepted", "message_id": None}
 
-    # Create a new message instance
-    new_message = Message(text=request.message, is_user=True, dialog_id=id)
-    
-    if len(dialog.messages) < 2:
-        dialog.name = request.message
-    else:
-        dialog.name = dialog.messages[1].text
-
-    # Add the new message to the session and commit
-    session.add(new_message)
-    session.commit()
-    session.refresh(new_message)  # Refresh to get the latest state of the object
+    new_message = await chat_service.add_message(session, id, request.message)
+    if new_message is None:
+        raise HTTPException(status_code=404, detail="Dialog not found")
+    await session.commit()
 
     # Return a success response
     return {"message": "Message saved successfully", "message_id": new_message.id}
\ No newline at end of file
@@ -0,0 +1,54 @@
+from typing import Optional
+
+from fastapi import APIRouter
+
+from app.services.deepseek import deepseek
+from app.services.embedding_cache import embedding_cache
+from app.services.encoder import encoder
+from app.services.executor import executor_stats
+from app.services.popular import popular_courses
+from app.services.qdrant import qdrant
+from app.services.selection_cache import selection_cache
+from app.services.write_behind import write_behind
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("/executors", response_model=dict, summary="Queue depth and wait time of executor pools")
+async def get_executor_metrics():
+    return executor_stats()
+
+
+@router.get("/encoder", response_model=dict, summary="Micro-batching statistics of query encoding")
+async def get_encoder_metrics():
+    return encoder.batcher.stats()
+
+
+@router.get("/embedding-cache", response_model=dict, summary="Hit/miss counters of the query embedding cache")
+async def get_embedding_cache_metrics():
+    return embedding_cache.stats()
+
+
+@router.get("/courses-sync", response_model=Optional[dict], summary="Result of the last Stepik courses sync")
+async def get_courses_sync_metrics():
+    return qdrant.last_sync
+
+
+@router.get("/popular-courses", response_model=dict, summary="Age and refresh timings of the popular courses cache")
+async def get_popular_courses_metrics():
+    return popular_courses.stats()
+
+
+@router.get("/deepseek", response_model=dict, summary="Hedging and circuit breaker state of deepseek calls")
+async def get_deepseek_metrics():
+    return deepseek.stats()
+
+
+@router.get("/selection-cache", response_model=dict, summary="Hit/miss counters of the LLM course selection cache")
+async def get_selection_cache_metrics():
+    return selection_cache.stats()
+
+
+@router.get("/write-behind", response_model=dict, summary="Queue depth and batch timings of background writes")
+async def get_write_behind_metrics():
+    return write_behind.stats()
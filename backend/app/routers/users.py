@@ -7,6 +7,8 @@ from app.config import settings
 import jwt
 from datetime import datetime, timedelta
 from app.services.user_service import fetch_user_info, get_or_create_user, user_info
+from app.services.database import get_session
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 from app.schemas.user import UserInfo
 
@@ -32,8 +34,8 @@ def get_current_user(request: Request):
     
 
 @router.get("/users/me", response_model=UserInfo)
-async def read_users_me( current_user: str = Depends(get_current_user)):
-    user = await user_info(int(current_user))
+async def read_users_me(current_user: str = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    user = await user_info(session, int(current_user))
     return UserInfo(**user.__dict__)
 
 @router.get("/login", response_description="URL to stepik website authorization")
@@ -52,7 +54,7 @@ async def logout():
     return response
 
 @router.get("/callback", response_class=RedirectResponse)
-async def get_access_token(code: str):
+async def get_access_token(code: str, session: AsyncSession = Depends(get_session)):
     client_id = os.getenv("CLIENT_ID", "")
     client_secret = os.getenv("CLIENT_SECRET", "")
     redirect_url = f"{settings.web_url}/api/callback"
@@ -73,7 +75,7 @@ async def get_access_token(code: str):
             raise HTTPException(status_code=400, detail="Access token not found in response")
 
         stepik_user_info = await fetch_user_info(access_token)
-        user_data = await get_or_create_user(stepik_user_info, code=code, access_token=access_token)
+        user_data = await get_or_create_user(session, stepik_user_info, code=code, access_token=access_token)
 
         jwt_token = create_access_token(data=user_data)
 
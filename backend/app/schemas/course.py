@@ -14,6 +14,7 @@ class CourseSearchRequest(BaseModel):
     chat_id: Optional[int] = Field(None)
     hours: int
     cost: int
+    fast: bool = Field(False)  # Choose courses with the local optimizer instead of the LLM
 
 # Модель одного курса в ответе
 class CourseSummary(BaseModel):
@@ -38,6 +39,22 @@ class CourseSummary(BaseModel):
     # section_desc: str # описание секции курса
 
 
+class SkillRoadmapRequest(BaseModel):
+    goal: str  # цель в свободной форме, например "хочу стать data scientist"
+    hours: int
+    cost: int
+
+
+class SkillPlan(BaseModel):
+    skill: str
+    subskills: List[str]
+
+
+class SkillRoadmapResponse(BaseModel):
+    skills: List[SkillPlan]
+    courses: List[CourseSummary]
+
+
 class CourseProgress(CourseSummary):
     progress: float
 
@@ -74,4 +74,23 @@ class DialogSchema(BaseModel):
     messages: List[MessageSchema] = Field(default_factory=list)
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class DialogSummarySchema(BaseModel):
+    id: int
+    name: Optional[str] = None
+    roadmap_id: Optional[int] = None
+
+    class Config:
+        orm_mode = True
+
+
+class DialogPage(BaseModel):
+    items: List[DialogSummarySchema]
+    next_cursor: Optional[int] = None  # Pass as `before` to get the next page; None on the last page
+
+
+class MessagePage(BaseModel):
+    items: List[MessageSchema]
+    next_cursor: Optional[int] = None  # Pass as `after` to get the next page; None on the last page
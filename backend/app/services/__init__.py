@@ -1,5 +1,6 @@
-from .executor import run_blocking
+from .executor import run_blocking, run_in_pool
 from .encoder import encoder
+from .stepik import stepik
 from .qdrant import qdrant
 from .database import *
 from .deepseek import deepseek
\ No newline at end of file
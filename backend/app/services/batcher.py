@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent `submit` calls into batches for `process`.
+
+    A batch is dispatched when it reaches `max_size` items or `window_ms` after its first item
+    arrived. At most `max_concurrency` batches are processed at once; while all slots are busy
+    new items keep accumulating, so batches grow with load.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Awaitable[List[Any]]],
+        window_ms: float,
+        max_size: int,
+        max_concurrency: int = 1,
+    ):
+        self.process = process
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.batches = 0
+        self.items = 0
+        self.max_batch = 0
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._task = None
+
+    async def submit(self, item):
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.window
+            while len(batch) < self.max_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            # Items that arrived while waiting for a free slot join this batch
+            while len(batch) < self.max_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        try:
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+            results = await self.process([item for item, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            logger.exception("Error processing micro-batch")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch,
+            "window_ms": self.window * 1000,
+            "max_size": self.max_size,
+        }
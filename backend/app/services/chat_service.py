@@ -0,0 +1,52 @@
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.roadmap import Dialog, Message
+
+logger = logging.getLogger(__name__)
+
+
+async def add_message(session: AsyncSession, dialog_id: int, text: str) -> Optional[Message]:
+    """Add a user message to the dialog `dialog_id` without committing; None if there is no such dialog."""
+    dialog = await session.get(Dialog, dialog_id)
+    if not dialog:
+        return None
+
+    # The dialog is named after its second message, the first user request; only that one is read
+    second = (await session.execute(
+        select(Message.text).filter(Message.dialog_id == dialog_id).order_by(Message.id).offset(1).limit(1)
+    )).scalar()
+    dialog.name = text if second is None else second
+
+    new_message = Message(text=text, is_user=True, dialog_id=dialog_id)
+    session.add(new_message)
+    # Flushed so that the next write of a write-behind batch sees it
+    await session.flush()
+    return new_message
+
+
+async def dialog_page(session: AsyncSession, owner: int, limit: int,
+                      before: Optional[int] = None) -> Tuple[List[Dialog], Optional[int]]:
+    """Up to `limit` dialogs of `owner` with ids below `before`, newest first, and the cursor of the next page."""
+    query = select(Dialog).filter(Dialog.owner == owner)
+    if before is not None:
+        query = query.filter(Dialog.id < before)
+    dialogs = (await session.execute(query.order_by(Dialog.id.desc()).limit(limit + 1))).scalars().all()
+    if len(dialogs) > limit:
+        return dialogs[:limit], dialogs[limit - 1].id
+    return dialogs, None
+
+
+async def message_page(session: AsyncSession, dialog_id: int, limit: int,
+                       after: Optional[int] = None) -> Tuple[List[Message], Optional[int]]:
+    """Up to `limit` messages of the dialog with ids above `after`, oldest first, and the cursor of the next page."""
+    query = select(Message).filter(Message.dialog_id == dialog_id)
+    if after is not None:
+        query = query.filter(Message.id > after)
+    messages = (await session.execute(query.order_by(Message.id).limit(limit + 1))).scalars().all()
+    if len(messages) > limit:
+        return messages[:limit], messages[limit - 1].id
+    return messages, None
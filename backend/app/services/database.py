@@ -1,18 +1,52 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from typing import AsyncIterator
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 import os
 
+from app.config import settings
+
 DB_USER = os.getenv("POSTGRES_USER")
 DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 DB_HOST = os.getenv("POSTGRES_HOST")
 DB_NAME = os.getenv("POSTGRES_DB")
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 
-engine = create_engine(DATABASE_URL)
+engine = create_async_engine(
+    DATABASE_URL,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=True,
+)
 
-Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-session = Session()
+# Objects stay usable after commit: with async sessions an expired attribute can't be lazily reloaded
+Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency: one session (and at most one pooled connection) per request."""
+    async with Session() as session:
+        yield session
+
+
+def create_schema(conn):
+    """
+    Create missing tables, plus the nullable columns and indexes added to existing ones
+    (`create_all` skips those).
+    """
+    existing = {table: {column["name"] for column in inspect(conn).get_columns(table)}
+                for table in inspect(conn).get_table_names()}
+    Base.metadata.create_all(conn)
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if table.name in existing and column.name not in existing[table.name] and column.nullable:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
@@ -1,9 +1,14 @@
+import asyncio
 import httpx
 import logging
 import json
-from typing import List
+import time
+from collections import deque
+from typing import List, Optional
 from app.config import settings
-from app.utils.query_logger import query_logger
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.course_filters import course_fits
+from app.utils.prompt_builder import estimate_tokens, roadmap_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -12,124 +17,241 @@ class DeepseekService:
     def __init__(self):
         self.api_key = settings.deepseek_api_key
         self.api_url = settings.deepseek_api_url
+        self.client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker(settings.deepseek_breaker_failures, settings.deepseek_breaker_reset)
+        self.latencies = deque(maxlen=100)  # Seconds of recent successful requests
+        self.ttfts = deque(maxlen=100)  # Seconds to the first streamed token of recent requests
+        self.prompt_tokens = deque(maxlen=100)  # Estimated tokens of recent prompts
+        self.requests = 0
+        self.hedges = 0
 
-    async def choose_courses(self, area, current_level, desired_skills, hours, cost, attempt, courses):
+    async def start(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        await self.close()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.deepseek_timeout, connect=settings.deepseek_connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.deepseek_max_connections,
+                max_keepalive_connections=settings.deepseek_max_connections,
+            ),
+            transport=transport,
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def hedge_delay(self) -> float:
+        """p95 latency of recent requests, or the configured delay until there are enough samples."""
+        if len(self.latencies) < 10:
+            return settings.deepseek_hedge_delay
+        latencies = sorted(self.latencies)
+        return latencies[int(len(latencies) * 0.95) - 1]
+
+    async def choose_courses(self, area, current_level, desired_skills, hours, cost, courses):
+        """
+        Ask deepseek for up to 5 courses forming a roadmap. If an answer takes longer than `hedge_delay`,
+        another attempt is launched in parallel (up to `deepseek_max_attempts`) and the first valid answer wins.
+        Returns None when no attempt named a valid course or the circuit breaker is open.
+        `courses` should be ordered from the most relevant: the prompt lists only the first ones
+        that fit into `llm_prompt_max_tokens` and `llm_max_candidates`.
+        """
         logger.info(f"API Key is {'present' if self.api_key else 'missing'}...")
 
         if not self.api_key or self.api_key == "":
             logger.warning("Deepseek API key not configured")
-            # fallback_queries = self._generate_fallback_queries(area, current_level, desired_skills, attempt)
-            # query_logger.log_queries(area, current_level, desired_skills, fallback_queries, "fallback")
             return None
 
+        if not self.breaker.allow():
+            logger.warning("Deepseek circuit breaker is open, skipping request")
+            return None
+
+        courses = [x for x in courses if course_fits(x, hours, cost)]
+        prompt, courses = roadmap_prompt(
+            area, current_level, desired_skills, hours, cost, courses,
+            max_tokens=settings.llm_prompt_max_tokens,
+            summary_tokens=settings.llm_summary_tokens,
+            max_candidates=settings.llm_max_candidates,
+        )
+        self.prompt_tokens.append(estimate_tokens(prompt))
+        logger.info(f"Prompt of {len(courses)} courses, ~{self.prompt_tokens[-1]} tokens")
+
+        tasks = set()
         try:
-            courses = [x for x in courses if (float(x['price']) == 0 or x['currency_code'] == 'RUB' and float(x['price']) <= cost) and float(x['duration']) <= hours]
-            prompt = f"""
-            You are a course recommender AI. Your job is to select up to 5 courses from the list of {len(courses)} that together form a coherent learning roadmap for the user.
-
-            User's learning profile:
-            - Goal: {area}
-            - Current level: {current_level}
-            - Desired skills to acquire: {desired_skills}
-            - Maximum total time to complete all courses in hours: {hours}
-            - Maximum total cost of all courses in RUB: {cost}
-
-            !!! IMPORTANT CONSTRAINTS (must follow strictly) !!!
-            - DO NOT INCLUDE ANY COURSE if:
-                • Its price is greater than 0 AND the user's budget is 0.
-            - Total duration of selected courses must NOT exceed {hours} hours.
-            - Total price in RUB of selected courses must NOT exceed {cost} RUB.
-
-            Each course includes:
-            - Title
-            - Summary
-            - Difficulty level (e.g., Beginner, Intermediate, Advanced)
-            - Number of learners who completed it
-            - Time to complete in hours
-            - Price (in the given currency)
-            - Currency code
-
-            Courses:
-            """
-            for idx, course in enumerate(courses):
-                prompt += f"\n{idx}. Title: {course['title']}; Summary: {course['summary']}; Difficulty: {course['difficulty']}; Learners: {course['pupils_num']}; Duration: {course['duration']}; Price: {course['price']}; Currency code: {course['currency_code']}"
-
-            prompt += (
-                "\n\nYour task:"
-                "\n- Select up to 5 courses that form a logical learning roadmap for the user's goal and desired skills."
-                "\n- The roadmap should make sense in order — start with foundational topics and build toward more advanced ones."
-                "\n- Avoid overlapping or redundant content."
-                "\n- Only include courses that are clearly relevant to the user's goals."
-                "\n- The **total time** of all selected courses must not exceed the user's limit."
-                "\n- The **total price** of all selected courses must not exceed the user's budget."
-                "\n- Among equally suitable options, prefer those with more learners (as a proxy for quality)."
-                "\n- If fewer than 5 courses are needed to build a roadmap, return only those."
-
-                "\n\nReturn a Python list of the selected course indexes in the recommended order of completion."
-                "\nOnly return the list, like this: [2, 7, 10] (no explanations)."
-            )
+            for attempt in range(settings.deepseek_max_attempts):
+                if attempt > 0:
+                    # The breaker may have opened since the request started
+                    if not self.breaker.allow():
+                        logger.warning("Deepseek circuit breaker is open, no more hedged attempts")
+                        break
+                    self.hedges += 1
+                tasks.add(asyncio.create_task(self._request(prompt, attempt)))
+                delay = self.hedge_delay()
+                while tasks:
+                    done, tasks = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        chosen = self._pick(courses, task.result())
+                        if chosen:
+                            return chosen
+                    if not done:
+                        break  # Hedge delay is over, launch one more attempt
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    chosen = self._pick(courses, task.result())
+                    if chosen:
+                        return chosen
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.api_url,
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "deepseek-chat",
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        "temperature": 0.05,
-                        "max_tokens": 500
-                    }
-                )
+    @staticmethod
+    def _pick(courses: List[dict], idxs: Optional[List[int]]) -> Optional[List[dict]]:
+        """Courses at the valid `idxs`; None when the answer names none of them."""
+        chosen = [courses[i] for i in idxs or [] if 0 <= i < len(courses)]
+        return chosen or None
 
-                logger.info(f"API Response status: {response.status_code}")
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None, json_mode: bool = False) -> str:
+        """
+        One plain chat completion through the pooled client, guarded by the circuit breaker.
+        Raises when the key is missing, the breaker is open or the call fails.
+        """
+        if not self.api_key:
+            raise ValueError("DEEPSEEK_API_KEY environment variable is not set")
+        if not self.breaker.allow():
+            raise RuntimeError("Deepseek circuit breaker is open")
+        if self.client is None:
+            await self.start()
+        body = {
+            "model": "deepseek-chat",
+            "messages": [
+                {"role": "system", "content": system_prompt or "You are a helpful assistant."},
+                {"role": "user", "content": prompt},
+            ],
+            "stream": False,
+        }
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+        self.requests += 1
+        try:
+            response = await self.client.post(
+                self.api_url,
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                json=body,
+            )
+            response.raise_for_status()
+            content = response.json()["choices"][0]["message"]["content"]
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return content
 
-                if response.status_code == 200:
-                    result = response.json()
-                    content = result["choices"][0]["message"]["content"]
-                    logger.info(f"API Response content: {content}")
-
-                    # Try to parse JSON from the response
-                    try:
-                        idxs = json.loads(content)
-                        if isinstance(idxs, list):
-                            logger.info(f"Chosen indexes (attempt {attempt + 1}): {idxs}")
-                            # Log the queries to file
-                            # query_logger.log_queries(area, current_level, desired_skills, idxs,
-                            #                          f"deepseek_attempt_{attempt + 1}")
-                            return [courses[i] for i in idxs]
-                        else:
-                            logger.warning("Invalid response format from Deepseek API")
-                            # fallback_queries = self._generate_fallback_queries(area, current_level, desired_skills, attempt)
-                            # query_logger.log_queries(area, current_level, desired_skills, fallback_queries,
-                            #                          f"fallback_invalid_format_attempt_{attempt + 1}")
-                            return None
-                    except json.JSONDecodeError:
-                        logger.warning("Failed to parse JSON from Deepseek API response")
-                        # fallback_queries = self._generate_fallback_queries(area, current_level, desired_skills, attempt)
-                        # query_logger.log_queries(area, current_level, desired_skills, fallback_queries,
-                        #                          f"fallback_json_error_attempt_{attempt + 1}")
-                        return None
-                else:
+    async def _request(self, prompt: str, attempt: int) -> Optional[List[int]]:
+        """One chat completion call; returns the chosen indexes or None. Never raises."""
+        if self.client is None:
+            await self.start()
+        self.requests += 1
+        started = time.perf_counter()
+        try:
+            async with self.client.stream(
+                "POST",
+                self.api_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": "deepseek-chat",
+                    "messages": [
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    "temperature": 0.05,
+                    "max_tokens": 500,
+                    "stream": settings.deepseek_stream,
+                }
+            ) as response:
+                logger.info(f"API Response status: {response.status_code}")
+                if response.status_code != 200:
+                    await response.aread()
                     logger.error(f"Deepseek API error: {response.status_code} - {response.text}")
-                    # fallback_queries = self._generate_fallback_queries(area, current_level, desired_skills, attempt)
-                    # query_logger.log_queries(area, current_level, desired_skills, fallback_queries,
-                    #                          f"fallback_api_error_attempt_{attempt + 1}")
+                    self.breaker.record_failure()
                     return None
-
+                content = await self._read_content(response, started)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
         except Exception as e:
-            logger.exception(f"Error calling Deepseek API: {str(e)}")
-            # fallback_queries = self._generate_fallback_queries(area, current_level, desired_skills, attempt)
-            # query_logger.log_queries(area, current_level, desired_skills, fallback_queries,
-            #                          f"fallback_exception_attempt_{attempt + 1}")
+            logger.warning(f"Error calling Deepseek API (attempt {attempt + 1}): {e!r}")
+            self.breaker.record_failure()
+            return None
+
+        self.breaker.record_success()
+        self.latencies.append(time.perf_counter() - started)
+        try:
+            logger.info(f"API Response content: {content}")
+            idxs = json.loads(content)
+        except (TypeError, ValueError):
+            logger.warning("Failed to parse JSON from Deepseek API response")
+            return None
+        if not isinstance(idxs, list) or not all(isinstance(i, int) for i in idxs):
+            logger.warning("Invalid response format from Deepseek API")
             return None
+        logger.info(f"Chosen indexes (attempt {attempt + 1}): {idxs}")
+        return idxs
+
+    async def _read_content(self, response: httpx.Response, started: float) -> Optional[str]:
+        """Message content of a streamed (server-sent events) or a plain JSON completion; records time to first token."""
+        if not response.headers.get("content-type", "").startswith("text/event-stream"):
+            await response.aread()
+            self.ttfts.append(time.perf_counter() - started)
+            try:
+                return response.json()["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError):
+                return None
+
+        parts = []
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            try:
+                delta = json.loads(data)["choices"][0]["delta"].get("content")
+            except (ValueError, KeyError, IndexError):
+                continue
+            if delta:
+                if not parts:
+                    self.ttfts.append(time.perf_counter() - started)
+                parts.append(delta)
+        return "".join(parts)
+
+    @staticmethod
+    def _percentile(values, q: float) -> Optional[float]:
+        if not values:
+            return None
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * q))]
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedged_requests": self.hedges,
+            "hedge_delay_seconds": self.hedge_delay(),
+            "avg_prompt_tokens": sum(self.prompt_tokens) / len(self.prompt_tokens) if self.prompt_tokens else 0.0,
+            "max_prompt_tokens": max(self.prompt_tokens, default=0),
+            "ttft_p50_seconds": self._percentile(self.ttfts, 0.5),
+            "ttft_p95_seconds": self._percentile(self.ttfts, 0.95),
+            "circuit_breaker": self.breaker.stats(),
+        }
 
 
 deepseek = DeepseekService()
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.utils.ttl_cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class DiskEmbeddingStore:
+    """
+    Fixed-capacity on-disk tier: vectors live in a memory-mapped float32 file,
+    slots are reused in ring order once the store is full.
+    The key -> slot index is kept in `index.json` and written on `flush`.
+    """
+
+    def __init__(self, directory: str, capacity: int, ttl: float):
+        self.directory = Path(directory)
+        self.capacity = capacity
+        self.ttl = ttl
+        self.vectors = None
+        self.entries = {}  # key -> (slot, stored_at)
+        self.slots = {}  # slot -> key
+        self.next_slot = 0
+        self.dirty = False
+
+    @property
+    def _vectors_path(self):
+        return self.directory / "vectors.f32"
+
+    @property
+    def _index_path(self):
+        return self.directory / "index.json"
+
+    def _open(self, dim: int, model: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index = None
+        if self._index_path.exists() and self._vectors_path.exists():
+            try:
+                index = json.loads(self._index_path.read_text())
+            except ValueError:
+                logger.warning("Embedding cache index is corrupted, starting from scratch")
+        if index and index.get("model") == model and index.get("dim") == dim and index.get("capacity") == self.capacity:
+            self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, dim))
+            self.entries = {key: (slot, stored_at) for key, (slot, stored_at) in index["entries"].items()}
+            self.slots = {slot: key for key, (slot, _) in self.entries.items()}
+            self.next_slot = index["next_slot"]
+            logger.info(f"Loaded {len(self.entries)} cached embeddings from {self.directory}")
+        else:
+            self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="w+", shape=(self.capacity, dim))
+            self.entries, self.slots, self.next_slot = {}, {}, 0
+        self.model = model
+        self.dim = dim
+
+    def ensure_open(self, dim: int, model: str):
+        if self.vectors is None:
+            self._open(dim, model)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        if self.vectors is None:
+            return None
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        slot, stored_at = entry
+        if time.time() - stored_at > self.ttl:
+            return None
+        return np.array(self.vectors[slot])
+
+    def set(self, key: str, vector: np.ndarray):
+        slot = self.entries[key][0] if key in self.entries else self.next_slot
+        if key not in self.entries:
+            old_key = self.slots.get(slot)
+            if old_key is not None:
+                del self.entries[old_key]
+            self.next_slot = (self.next_slot + 1) % self.capacity
+        self.vectors[slot] = vector
+        self.entries[key] = (slot, time.time())
+        self.slots[slot] = key
+        self.dirty = True
+
+    def flush(self):
+        if self.vectors is None or not self.dirty:
+            return
+        self.vectors.flush()
+        index = {
+            "model": self.model,
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "next_slot": self.next_slot,
+            "entries": self.entries,
+        }
+        tmp_path = self._index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, self._index_path)
+        self.dirty = False
+
+
+class EmbeddingCache:
+    """LRU + TTL cache of query embeddings keyed on normalized text and model name, with an optional disk tier."""
+
+    def __init__(self, maxsize: int, ttl: float, directory: str = "", disk_size: int = 0, flush_every: int = 100):
+        self.memory = LRUTTLCache(maxsize, ttl)
+        self.disk = DiskEmbeddingStore(directory, disk_size, ttl) if directory and disk_size > 0 else None
+        self.disk_hits = 0
+        self.flush_every = flush_every
+        self._writes = 0
+
+    @staticmethod
+    def key(text: str, model: str) -> str:
+        return hashlib.sha1(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str, model: str) -> Optional[np.ndarray]:
+        key = self.key(text, model)
+        vector = self.memory.get(key)
+        if vector is None and self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self.memory.set(key, vector)
+        return vector
+
+    def set(self, text: str, model: str, vector: np.ndarray):
+        key = self.key(text, model)
+        self.memory.set(key, vector)
+        if self.disk is not None:
+            self.disk.ensure_open(len(vector), model)
+            self.disk.set(key, vector)
+            self._writes += 1
+            if self._writes % self.flush_every == 0:
+                self.disk.flush()
+
+    def load(self, dim: int, model: str):
+        """Open the disk tier ahead of the first query so earlier runs' embeddings are served."""
+        if self.disk is not None:
+            self.disk.ensure_open(dim, model)
+
+    def flush(self):
+        if self.disk is not None:
+            self.disk.flush()
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        # Memory misses served from disk count as hits
+        stats["hits"] += self.disk_hits
+        stats["misses"] -= self.disk_hits
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["disk_hits"] = self.disk_hits
+        stats["disk_size"] = len(self.disk.entries) if self.disk is not None else 0
+        return stats
+
+
+embedding_cache = EmbeddingCache(
+    maxsize=settings.embedding_cache_size,
+    ttl=settings.embedding_cache_ttl,
+    directory=settings.embedding_cache_dir,
+    disk_size=settings.embedding_cache_disk_size,
+)
@@ -1,35 +1,166 @@
 import logging
+from pathlib import Path
+from typing import List
+
+import numpy as np
 import torch
 from sentence_transformers import SentenceTransformer
 
-from app.services import run_blocking
+from app.services import run_in_pool
+from app.services.batcher import MicroBatcher
+from app.services.embedding_cache import embedding_cache
+from app.services.executor import INFERENCE, INGEST
 from app.config import settings
+from app.utils.reduction import DimensionReducer, vector_model
 
 logger = logging.getLogger(__name__)
 
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_onnx_model(name: str, quantized: bool = False, threads: int = 0, directory: str = "models/onnx",
+                    int8_config: str = "avx2") -> SentenceTransformer:
+    """
+    SentenceTransformer running on ONNX Runtime (CPU). The model is exported to `directory` on first use,
+    with `quantized` also dynamically quantized to int8 for the `int8_config` instruction set.
+    """
+    import onnxruntime
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    path = Path(directory) / name.replace("/", "__")
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if threads > 0:
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        model_kwargs["session_options"] = options
+
+    if not (path / "onnx" / "model.onnx").exists():
+        logger.info(f"Exporting {name} to ONNX in {path}")
+        SentenceTransformer(name, backend="onnx", cache_folder="models/").save(str(path))
+    file_name = "onnx/model.onnx"
+    if quantized:
+        # avx2 is quantized to unsigned int8 ("quint8"), the other configs to signed ("qint8")
+        pattern = f"onnx/model_*int8_{int8_config}.onnx"
+        if not any(path.glob(pattern)):
+            logger.info(f"Quantizing the ONNX model to int8 ({int8_config})")
+            export_dynamic_quantized_onnx_model(
+                SentenceTransformer(str(path), backend="onnx", model_kwargs=dict(model_kwargs)),
+                int8_config, str(path),
+            )
+        file_name = next(path.glob(pattern)).relative_to(path).as_posix()
+    return SentenceTransformer(str(path), backend="onnx", model_kwargs={**model_kwargs, "file_name": file_name})
+
+
+def load_model(name: str, backend: str = "torch", threads: int = 0) -> SentenceTransformer:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}', expected one of {BACKENDS}")
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if backend != "torch":
+        return load_onnx_model(name, quantized=backend == "onnx-int8", threads=threads,
+                               int8_config=settings.encoder_int8_config)
+    model = SentenceTransformer(name, cache_folder="models/")
+    model.to("cuda" if torch.cuda.is_available() else "cpu")
+    return model
+
 
 class EncoderService:
     def __init__(self):
         self.model = None
+        self.reducer = DimensionReducer(settings.embedding_dim, settings.embedding_reduction, settings.embedding_pca_path)
+        self.batcher = MicroBatcher(
+            self._encode_queries,
+            window_ms=settings.encode_batch_window_ms,
+            max_size=settings.encode_batch_max_size,
+            max_concurrency=settings.executor_inference_workers,
+        )
 
     async def initialize(self):
         try:
-            logger.info(f"Init model: {settings.embedding_model}")
-            self.model = await run_blocking(SentenceTransformer, settings.embedding_model, cache_folder="models/")
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model.to(device)
-            logger.info(f"Model loaded and set up: {device}")
+            logger.info(f"Init model: {settings.embedding_model} ({settings.encoder_backend} backend)")
+            self.model = await run_in_pool(INFERENCE, load_model, settings.embedding_model,
+                                           settings.encoder_backend, settings.encoder_threads)
+            logger.info(f"Model loaded and set up: {self.model.device}")
+            self.reducer.load()
+            embedding_cache.load(self.dimension(), vector_model())
         except Exception as e:
             logger.exception("Error model vectorization")
             raise
 
+    def dimension(self) -> int:
+        """Size of the produced vectors, after the optional reduction."""
+        return self.reducer.output_dim(self.model.get_sentence_embedding_dimension())
+
     async def vectorize(self, text: str):
+        vector = embedding_cache.get(text, vector_model())
+        if vector is not None:
+            logger.debug("Vectorize cache hit")
+            return vector
         try:
             logger.debug(f"Vectorize text of length {len(text)}")
-            return await run_blocking(self.model.encode, text, show_progress_bar=False)
+            if settings.encode_micro_batching:
+                vector = await self.batcher.submit(text)
+            else:
+                vector = self.reducer(await run_in_pool(INFERENCE, self.model.encode, text, show_progress_bar=False))
+            embedding_cache.set(text, vector_model(), vector)
+            return vector
         except Exception as e:
             logger.exception("Error Vectorization")
             raise
 
+    async def vectorize_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Vectors of several queries; the ones missing in the cache are encoded in one call."""
+        vectors = [embedding_cache.get(text, vector_model()) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            logger.debug(f"Vectorize {len(missing)} of {len(texts)} queries")
+            encoded = await self._encode_queries([texts[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                embedding_cache.set(texts[i], vector_model(), vector)
+                vectors[i] = vector
+        return vectors
+
+    async def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        return self.reducer(
+            await run_in_pool(INFERENCE, self.model.encode, texts, batch_size=len(texts), show_progress_bar=False)
+        )
+
+    async def close(self):
+        await self.batcher.stop()
+        embedding_cache.flush()
+
+    async def vectorize_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode many texts at once. With `encode_sort_by_length` the texts are sorted by length
+        and split into buckets of `encode_batch_size`, each bucket being a separate call
+        in the ingest pool.
+        Rows of the result are in the same order as `texts`.
+        """
+        if not texts:
+            return np.empty((0, self.dimension()), dtype=np.float32)
+
+        batch_size = max(1, settings.encode_batch_size)
+        try:
+            logger.debug(f"Vectorize batch of {len(texts)} texts")
+            if not settings.encode_sort_by_length:
+                return self.reducer(
+                    await run_in_pool(INGEST, self.model.encode, texts, batch_size=batch_size, show_progress_bar=False)
+                )
+
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            vectors = None
+            for start in range(0, len(order), batch_size):
+                bucket = order[start:start + batch_size]
+                encoded = self.reducer(await run_in_pool(
+                    INGEST, self.model.encode, [texts[i] for i in bucket], batch_size=len(bucket), show_progress_bar=False
+                ))
+                if vectors is None:
+                    vectors = np.empty((len(texts), encoded.shape[1]), dtype=encoded.dtype)
+                vectors[bucket] = encoded
+            return vectors
+        except Exception as e:
+            logger.exception("Error batch vectorization")
+            raise
+
 
 encoder = EncoderService()
@@ -1,12 +1,105 @@
 import asyncio
 import logging
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 
-executor = ThreadPoolExecutor(max_workers=1)
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Named pools:
+#   inference - interactive model calls (query encoding)
+#   ingest    - bulk model calls of the background course import
+#   io        - blocking network calls (Qdrant client)
+INFERENCE = "inference"
+INGEST = "ingest"
+IO = "io"
+
+
+class InstrumentedExecutor:
+    """ThreadPoolExecutor that tracks queue depth and time spent waiting for a free worker."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def submit(self, func, *args, **kwargs):
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def call():
+            wait = time.perf_counter() - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        def done(future):
+            # A future can only be cancelled before it starts, so `call` never ran for it
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+                    self.cancelled += 1
+
+        future = self._executor.submit(call)
+        future.add_done_callback(done)
+        return future
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "avg_wait_ms": self.total_wait / started * 1000 if started else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+pools = {
+    INFERENCE: InstrumentedExecutor(INFERENCE, settings.executor_inference_workers),
+    INGEST: InstrumentedExecutor(INGEST, settings.executor_ingest_workers),
+    IO: InstrumentedExecutor(IO, settings.executor_io_workers),
+}
+
+
+async def run_in_pool(pool: str, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    logger.debug(f"Call of blocking function in '{pool}' pool: {func.__name__} with args={args} kwargs={kwargs}")
+    return await asyncio.wrap_future(pools[pool].submit(func, *args, **kwargs), loop=loop)
+
+
 async def run_blocking(func, *args, **kwargs):
-    loop = asyncio.get_event_loop()
-    logger.debug(f"Call of blocking function: {func.__name__} with args={args} kwargs={kwargs}")
-    return await loop.run_in_executor(executor, lambda: func(*args, **kwargs))
+    return await run_in_pool(IO, func, *args, **kwargs)
+
+
+def executor_stats() -> dict:
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+def shutdown_executors():
+    for pool in pools.values():
+        pool.shutdown(wait=False)
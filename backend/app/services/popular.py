@@ -0,0 +1,29 @@
+import logging
+from typing import List
+
+from app.config import settings
+from app.services.stepik import stepik
+from app.utils.courses import normalize_courses
+from app.utils.swr_cache import SWRCache
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_popular_courses() -> List[dict]:
+    logger.info("Send request to Stepik: course-recommendations")
+    courses_ids_set = await stepik.course_recommendations()
+    logger.info(f"Got {len(courses_ids_set)} courses")
+
+    logger.info("Request detailed course info, ratings and authors")
+    courses_info, reviews, authors = await stepik.courses_with_details(courses_ids_set)
+
+    courses = normalize_courses(courses_info, reviews, authors)
+    return list(courses.values())
+
+
+popular_courses = SWRCache(
+    "popular_courses",
+    fetch_popular_courses,
+    max_age=settings.popular_courses_max_age,
+    refresh_interval=settings.popular_courses_refresh_interval,
+)
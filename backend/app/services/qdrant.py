@@ -1,44 +1,177 @@
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import hashlib
+import json
 import logging
+import time
 from qdrant_client import QdrantClient, models
 from qdrant_client.conversions import common_types as types
 
-from app.services import run_blocking, encoder
+from app.services import run_blocking, encoder, stepik
+from app.config import settings
+from app.utils.bm25 import BM25Index
+from app.utils.courses import normalize_courses
+from app.utils.fusion import reciprocal_rank_fusion
+from app.utils.reduction import vector_model
 
-import httpx
 import asyncio
 import traceback
 
 logger = logging.getLogger(__name__)
 
 
+def lexical_text(course: dict) -> str:
+    return "\n".join(str(course.get(field) or "") for field in LEXICAL_FIELDS)
+
+
+def course_text(course: dict) -> str:
+    return (
+        f"Название: {course['title']} ({course['title_en']})\n"
+        f"Сложность: {course['difficulty']}\n"
+        f"Резюме: {course['summary']}"
+    )
+
+
+# Fields that define the course embedding; a change in any of them requires re-encoding
+CONTENT_FIELDS = ("title", "title_en", "difficulty", "summary")
+# Bump to re-encode every course on the next sync
+CONTENT_HASH_VERSION = 1
+# Fields searched by the lexical (BM25) index
+LEXICAL_FIELDS = ("title", "title_en", "summary", "acquired_skills")
+# Payload keys written by the sync itself
+SYNC_FIELDS = ("content_hash", "payload_hash", "synced_at")
+# Bump when the payload format changes so that the next sync rewrites every payload
+PAYLOAD_VERSION = 2
+# Payload fields needed to rank candidates and build the LLM prompt
+SEARCH_PAYLOAD_FIELDS = [
+    "id", "title", "summary", "difficulty", "pupils_num", "duration", "price", "currency_code", "rating"
+]
+# Payload fields used in search filters
+PAYLOAD_INDEXES = {
+    "price": models.PayloadSchemaType.INTEGER,
+    "currency_code": models.PayloadSchemaType.KEYWORD,
+    "duration": models.PayloadSchemaType.INTEGER,
+    "difficulty": models.PayloadSchemaType.KEYWORD,
+}
+
+
+def _hash(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def content_hash(course: dict) -> str:
+    return _hash([CONTENT_HASH_VERSION, vector_model()] + [course.get(field) for field in CONTENT_FIELDS])
+
+
+def payload_hash(course: dict) -> str:
+    return _hash([PAYLOAD_VERSION, {key: value for key, value in course.items() if key not in SYNC_FIELDS}])
+
+
+def quantization_config() -> Optional[types.QuantizationConfig]:
+    if settings.qdrant_quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if settings.qdrant_quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def search_params() -> Optional[models.SearchParams]:
+    if quantization_config() is None:
+        return None
+    return models.SearchParams(quantization=models.QuantizationSearchParams(
+        rescore=settings.qdrant_quantization_rescore,
+        oversampling=settings.qdrant_quantization_oversampling,
+    ))
+
+
+def plan_sync(existing: Dict[int, Tuple[Optional[str], Optional[str]]], courses: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """
+    Split freshly fetched courses into those that must be re-encoded (new or changed content)
+    and those whose embedding is still valid but whose payload changed.
+    `existing` maps point id to its stored (content_hash, payload_hash).
+    """
+    to_encode, to_update = [], []
+    for course in courses:
+        stored_content, stored_payload = existing.get(course["id"], (None, None))
+        course["content_hash"] = content_hash(course)
+        course["payload_hash"] = payload_hash(course)
+        if stored_content != course["content_hash"]:
+            to_encode.append(course)
+        elif stored_payload != course["payload_hash"]:
+            to_update.append(course)
+    return to_encode, to_update
+
+
 class QdrantService:
     def __init__(self):
         self.client = None
+        self.last_sync = None
+        self.lexical = BM25Index()  # Filled by `loadCourses`
 
     def initialize(self, host: str, port: int):
         logger.info(f"Init Qdrant client on {host}:{port}")
         self.client = QdrantClient(host=host, port=port)
+        if self.client.collection_exists(collection_name="courses"):
+            logger.info("Collection 'courses' already exists")
+            self._update_collection()
         if not self.client.collection_exists(collection_name="courses"):
             logger.info("Collection 'courses' is not found, try again")
             self.client.create_collection(
                 collection_name="courses",
                 vectors_config=models.VectorParams(
-                    size=encoder.model.get_sentence_embedding_dimension(),
-                    distance=models.Distance.COSINE
+                    size=encoder.dimension(),
+                    distance=models.Distance.COSINE,
+                    on_disk=settings.qdrant_vectors_on_disk,
                 ),
+                quantization_config=quantization_config(),
             )
-        else:
-            logger.info("Collection 'courses' already exists")
 
-    async def search(self, query: List[float], collection_name: str, limit: int = 10) -> List[dict]:
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            self.client.create_payload_index(collection_name="courses", field_name=field_name,
+                                             field_schema=field_schema)
+
+    def _update_collection(self):
+        """
+        Apply the configured quantization and on-disk storage to the existing collection.
+        A collection of another vector size is dropped; the next sync fills it again.
+        """
+        config = self.client.get_collection(collection_name="courses").config
+        vectors = config.params.vectors
+        if vectors.size != encoder.dimension():
+            logger.warning(f"Collection 'courses' has {vectors.size}-d vectors, {encoder.dimension()} expected, "
+                           f"recreating it")
+            self.client.delete_collection(collection_name="courses")
+            return
+        quantization = quantization_config()
+        if config.quantization_config != quantization or bool(vectors.on_disk) != settings.qdrant_vectors_on_disk:
+            logger.info(f"Updating collection 'courses': quantization={settings.qdrant_quantization or 'none'}, "
+                        f"vectors on disk={settings.qdrant_vectors_on_disk}")
+            self.client.update_collection(
+                collection_name="courses",
+                vectors_config={"": models.VectorParamsDiff(on_disk=settings.qdrant_vectors_on_disk)},
+                quantization_config=quantization or models.Disabled.DISABLED,
+            )
+
+    async def search(self, query: List[float], collection_name: str, limit: int = 10,
+                     query_filter: Optional[models.Filter] = None,
+                     with_payload: Union[bool, Sequence[str], models.PayloadSelector] = True,
+                     with_vectors: bool = False) -> List[dict]:
+        """
+        `with_payload` may be a list of payload fields to return (or a PayloadSelector to include/exclude
+        fields), so that only what ranking needs travels over the wire; see `hydrate` for the full payloads.
+        """
         logger.info(f"Search in collection '{collection_name}' with limit {limit}")
         try:
             result = await run_blocking(
                 self.client.query_points,
                 collection_name=collection_name,
                 query=query,
-                limit=limit
+                query_filter=query_filter,
+                limit=limit,
+                with_payload=with_payload,
+                with_vectors=with_vectors,
+                search_params=search_params(),
             )
             logger.info(f"Found {len(result.points)} similar")
             return result.points
@@ -46,103 +179,211 @@ class QdrantService:
             logger.exception("Error Searching in Qdrant")
             raise
 
-    async def loadCourses(self):
-        logger.info("Load courses from Stepik")
-        async with httpx.AsyncClient(timeout=None) as client:
-            courses = {}
-            courses_ids_set = set()
-            points = []
-            page = 1
+    async def search_batch(self, queries: List[List[float]], collection_name: str, limit: int = 10,
+                           query_filter: Optional[models.Filter] = None,
+                           with_payload: Union[bool, Sequence[str], models.PayloadSelector] = True) -> List[list]:
+        """Several searches with the same filter in one request; returns the points of every query."""
+        logger.info(f"Batch search of {len(queries)} queries in collection '{collection_name}' with limit {limit}")
+        try:
+            responses = await run_blocking(
+                self.client.query_batch_points,
+                collection_name=collection_name,
+                requests=[
+                    models.QueryRequest(query=list(map(float, query)), filter=query_filter, limit=limit,
+                                        with_payload=with_payload, params=search_params())
+                    for query in queries
+                ],
+            )
+            return [response.points for response in responses]
+        except Exception as e:
+            logger.exception("Error Searching in Qdrant")
+            raise
+
+    async def hybrid_search(self, text: str, queries: List[List[float]], collection_name: str, limit: int = 10,
+                            query_filter: Optional[models.Filter] = None,
+                            with_payload: Union[bool, Sequence[str], models.PayloadSelector] = True) -> list:
+        """
+        Dense search of every vector in `queries` fused (RRF) with a BM25 search of `text`.
+        The lexical hits are scored against the first vector and filtered in the same batch request,
+        so every returned point has a cosine score and passes `query_filter`.
+        """
+        lexical_ids = [doc_id for doc_id, _ in self.lexical.search(text, limit)]
+        if not lexical_ids:
+            if len(queries) == 1:
+                return await self.search(queries[0], collection_name, limit, query_filter, with_payload)
+            return reciprocal_rank_fusion(
+                await self.search_batch(queries, collection_name, limit, query_filter, with_payload)
+            )[:limit]
 
-            try:
-                while True:
-                    logger.info(f"Getting page courses list: {page}")
-                    res = await client.get(f"https://stepik.org/api/course-lists?page={page}")
-                    course_lists = res.json()
-                    for section in course_lists["course-lists"]:
-                        logger.info(f"Getting courses from: {section['title']}")
-                        courses_ids_set.update(section["courses"])
-
-                    if not course_lists['meta']['has_next']:
-                        break
-                    page += 1
-
-                logger.info(f"Found {len(courses_ids_set)} unique courses")
-
-                courses_ids_list = list(courses_ids_set)
-                for i in range(0, len(courses_ids_list), 100):
-                    subset = courses_ids_list[i:i + 100]
-                    logger.info(f"Processing courses: {i} - {i + len(subset)}")
-                    params = {'ids[]': subset}
-                    res = await client.get("https://stepik.org/api/courses", params=params)
-                    course_data = res.json()["courses"]
-
-                    review_ids = []
-                    author_ids = []
-
-                    for course_info in course_data:
-                        if course_info["authors"]:
-                            author_ids.append(course_info["authors"][0])
-                        review_ids.append(course_info["review_summary"])
-                        courses[course_info["id"]] = {
-                            "id": course_info["id"],
-                            "cover_url": course_info["cover"],
-                            "title": course_info["title"],
-                            "duration": int(course_info["time_to_complete"] / 3600) if course_info[
-                                "time_to_complete"] else 0,
-                            "difficulty": course_info["difficulty"],
-                            "price": 0 if course_info["price"] is None else course_info["price"],
-                            "currency_code": course_info["currency_code"],
-                            "pupils_num": course_info["learners_count"],
-                            "authors": course_info["authors"][0] if course_info["authors"] else "",
-                            "rating": 5,
-                            "url": f"https://stepik.org/course/{course_info['id']}/promo",
-                            "description": course_info["description"],
-                            "summary": course_info["summary"],
-                            "target_audience": course_info["target_audience"],
-                            "acquired_skills": ''.join(course_info["acquired_skills"]),
-                            "acquired_assets": ''.join(course_info["acquired_assets"]),
-                            "title_en": course_info["title_en"],
-                            "learning_format": course_info["learning_format"],
-                        }
-
-                    logger.info("Getting course ratings")
-                    reviews = (await client.get("https://stepik.org/api/course-review-summaries",
-                                                params={'ids[]': review_ids})).json()
-                    for review in reviews["course-review-summaries"]:
-                        if review["course"] in courses:
-                            courses[review["course"]]["rating"] = int(review["average"])
-
-                    logger.info("Getting authors info")
-                    authors = (await client.get("https://stepik.org/api/users", params={'ids[]': author_ids})).json()
-                    for author in authors["users"]:
-                        for i in courses:
-                            if courses[i]["authors"] == author["id"]:
-                                courses[i]["authors"] = author["full_name"]
-                    for i in courses:
-                        if str(courses[i]["authors"]).isdigit():
-                            courses[i]["authors"] = ""
-
-                    logger.info("Starting course vectorization")
-                    for course in courses.values():
-                        vector = await encoder.vectorize(
-                            f"Название: {course['title']} ({course['title_en']})\n"
-                            f"Сложность: {course['difficulty']}\n"
-                            f"Резюме: {course['summary']}"
-                        )
-                        points.append(models.PointStruct(id=course["id"], vector=vector, payload=course))
+        lexical_filter = models.Filter(must=[models.HasIdCondition(has_id=lexical_ids)]
+                                       + ([query_filter] if query_filter is not None else []))
+        requests = [
+            models.QueryRequest(query=list(map(float, query)), filter=query_filter, limit=limit,
+                                with_payload=with_payload, params=search_params())
+            for query in queries
+        ] + [
+            models.QueryRequest(query=list(map(float, queries[0])), filter=lexical_filter,
+                                limit=len(lexical_ids), with_payload=with_payload, params=search_params())
+        ]
+        logger.info(f"Hybrid search of {len(queries)} queries and {len(lexical_ids)} lexical hits "
+                    f"in collection '{collection_name}'")
+        try:
+            responses = await run_blocking(self.client.query_batch_points, collection_name=collection_name,
+                                           requests=requests)
+        except Exception as e:
+            logger.exception("Error Searching in Qdrant")
+            raise
+        lexical_rank = {doc_id: rank for rank, doc_id in enumerate(lexical_ids)}
+        lexical_points = sorted(responses[-1].points, key=lambda point: lexical_rank[point.id])
+        return reciprocal_rank_fusion([response.points for response in responses[:-1]] + [lexical_points])[:limit]
+
+    async def hydrate(self, courses: List[dict], collection_name: str = "courses") -> List[dict]:
+        """Replace projected course payloads with full ones, keeping the order. Courses missing in Qdrant are kept as is."""
+        if not courses:
+            return courses
+        try:
+            records = await run_blocking(
+                self.client.retrieve,
+                collection_name=collection_name,
+                ids=[course["id"] for course in courses],
+                with_payload=True,
+                with_vectors=False,
+            )
+        except Exception as e:
+            logger.exception("Error retrieving courses from Qdrant")
+            raise
+        payloads = {record.id: record.payload for record in records}
+        return [payloads.get(course["id"], course) for course in courses]
+
+    async def vectors(self, ids: List[int], collection_name: str = "courses") -> Dict[int, List[float]]:
+        records = await run_blocking(
+            self.client.retrieve,
+            collection_name=collection_name,
+            ids=ids,
+            with_payload=False,
+            with_vectors=True,
+        )
+        return {record.id: record.vector for record in records}
+
+    async def _stored_hashes(self) -> Dict[int, Tuple[Optional[str], Optional[str]]]:
+        hashes = {}
+        offset = None
+        while True:
+            records, offset = await run_blocking(
+                self.client.scroll,
+                collection_name="courses",
+                limit=1000,
+                offset=offset,
+                with_payload=["content_hash", "payload_hash"],
+                with_vectors=False,
+            )
+            for record in records:
+                hashes[record.id] = (record.payload.get("content_hash"), record.payload.get("payload_hash"))
+            if offset is None:
+                return hashes
+
+    async def _fetch_courses_page(self, ids: List[int]) -> Dict[int, dict]:
+        """Fetch one page of courses with their ratings and authors and turn it into payload dicts."""
+        course_data, reviews, authors = await stepik.courses_with_details(ids)
+        return normalize_courses(course_data, reviews, authors)
+
+    async def loadCourses(self, full: Optional[bool] = None):
+        """
+        Sync the `courses` collection with Stepik.
+        Pages of courses are fetched concurrently (bounded by the Stepik client) and encoded as they arrive.
+        In incremental mode only new or changed courses are re-encoded, courses whose payload changed
+        get their payload overwritten, and points of courses that are no longer listed are deleted.
+        """
+        if full is None:
+            full = settings.courses_sync_mode == "full"
+        logger.info(f"Load courses from Stepik ({'full' if full else 'incremental'} sync)")
+        encoded = updated = 0
+        page_tasks = []
+
+        try:
+            existing = await self._stored_hashes()
+            logger.info(f"Found {len(existing)} courses in Qdrant")
+
+            courses_ids_set = await stepik.course_list_ids()
+            logger.info(f"Found {len(courses_ids_set)} unique courses")
+
+            courses_ids_list = list(courses_ids_set)
+            page_tasks = [
+                asyncio.create_task(self._fetch_courses_page(courses_ids_list[i:i + 100]))
+                for i in range(0, len(courses_ids_list), 100)
+            ]
+            for processed, next_page in enumerate(asyncio.as_completed(page_tasks), start=1):
+                courses = await next_page
+                logger.info(f"Processing courses page {processed}/{len(page_tasks)}")
+
+                for course in courses.values():
+                    self.lexical.add(course["id"], lexical_text(course))
+                to_encode, to_update = plan_sync({} if full else existing, list(courses.values()))
+                synced_at = int(time.time())
+
+                if to_encode:
+                    logger.info(f"Starting course vectorization: {len(to_encode)} new or changed")
+                    vectors = await encoder.vectorize_batch([course_text(course) for course in to_encode])
+                    points = []
+                    for course, vector in zip(to_encode, vectors):
+                        course["synced_at"] = synced_at
+                        points.append(models.PointStruct(id=course["id"], vector=vector.tolist(), payload=course))
 
                     logger.info(f"Loaded {len(points)} dots in Qdrant")
-                    self.client.upload_points(collection_name="courses", points=points)
+                    await run_blocking(self.client.upload_points, collection_name="courses", points=points)
+                    encoded += len(points)
+
+                if to_update:
+                    logger.info(f"Updating payload of {len(to_update)} courses")
+                    operations = []
+                    for course in to_update:
+                        course["synced_at"] = synced_at
+                        operations.append(models.OverwritePayloadOperation(
+                            overwrite_payload=models.SetPayload(payload=course, points=[course["id"]])
+                        ))
+                    await run_blocking(self.client.batch_update_points, collection_name="courses",
+                                       update_operations=operations)
+                    updated += len(to_update)
 
-                    courses.clear()
-                    points.clear()
+            stale_ids = [point_id for point_id in existing if point_id not in courses_ids_set]
+            if stale_ids and courses_ids_set:
+                logger.info(f"Deleting {len(stale_ids)} courses that are no longer on Stepik")
+                await run_blocking(self.client.delete, collection_name="courses",
+                                   points_selector=models.PointIdsList(points=stale_ids))
+                for point_id in stale_ids:
+                    self.lexical.remove(point_id)
 
-                logger.info("Successful course download to Qdrant")
+            logger.info(
+                f"Successful course download to Qdrant: {encoded} encoded, {updated} payloads updated, "
+                f"{len(stale_ids)} deleted"
+            )
+            self.last_sync = {
+                "finished_at": int(time.time()),
+                "mode": "full" if full else "incremental",
+                "courses": len(courses_ids_set),
+                "encoded": encoded,
+                "payloads_updated": updated,
+                "deleted": len(stale_ids),
+                "lexical_documents": len(self.lexical),
+            }
 
-            except Exception as e:
-                logger.exception("Error Loading to Qdrant")
-                raise
+        except Exception as e:
+            logger.exception("Error Loading to Qdrant")
+            raise
+        finally:
+            for task in page_tasks:
+                task.cancel()
+
+    async def syncCourses(self):
+        """Run `loadCourses` at startup and then every `courses_sync_interval_hours`, if set."""
+        while True:
+            try:
+                await self.loadCourses()
+            except Exception:
+                logger.error("Courses sync failed")
+            if settings.courses_sync_interval_hours <= 0:
+                return
+            await asyncio.sleep(settings.courses_sync_interval_hours * 3600)
 
 
 qdrant = QdrantService()
@@ -0,0 +1,84 @@
+import logging
+from typing import List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.roadmap import Roadmap, RoadmapStatus, Dialog, Message, Course, roadmap_courses
+from app.schemas.course import CourseSummary
+
+logger = logging.getLogger(__name__)
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+
+def course_rows(courses: List[dict]) -> List[dict]:
+    """
+    Validated `courses` columns, one row per course id (the last occurrence wins), ordered by id:
+    concurrent upserts then lock shared course rows in the same order and can't deadlock.
+    """
+    rows = {}
+    for course in courses:
+        row = CourseSummary(**course).model_dump()
+        rows[row["id"]] = row
+    return [rows[course_id] for course_id in sorted(rows)]
+
+
+def upsert_courses_statement(dialect: str, rows: List[dict]):
+    """One INSERT for all `rows` that refreshes the metadata of courses already stored."""
+    statement = UPSERT_DIALECTS[dialect].insert(Course).values(rows)
+    columns = {name: statement.excluded[name] for name in rows[0] if name != "id"}
+    return statement.on_conflict_do_update(index_elements=[Course.id], set_=columns)
+
+
+async def add_roadmap(session: AsyncSession, chat_id: int, courses: List[dict]) -> Optional[int]:
+    """
+    Write `courses` as the roadmap of the dialog `chat_id` without committing: the roadmap row,
+    a bulk upsert of the courses, the roadmap links and the dialog update, with a constant number
+    of statements. Returns the roadmap id or None if there is no such dialog.
+    """
+    dialog = (await session.execute(select(Dialog.id, Dialog.name).filter(Dialog.id == chat_id))).first()
+    if dialog is None:
+        logger.warning(f"Dialog {chat_id} not found, roadmap is not saved")
+        return None
+    # The roadmap is named after the first user request, the second message of the dialog
+    name = (await session.execute(
+        select(Message.text).filter(Message.dialog_id == chat_id).order_by(Message.id).offset(1).limit(1)
+    )).scalar() or dialog.name or ""
+
+    rows = course_rows(courses)
+    roadmap_id = (await session.execute(
+        insert(Roadmap).values(status=RoadmapStatus.notNow, name=name).returning(Roadmap.id)
+    )).scalar_one()
+    if rows:
+        await session.execute(upsert_courses_statement(session.get_bind().dialect.name, rows))
+        # Links keep the order the courses were chosen in, the upsert above is in id order
+        course_ids = list(dict.fromkeys(course["id"] for course in courses))
+        await session.execute(insert(roadmap_courses), [
+            {"roadmap_id": roadmap_id, "course_id": course_id, "position": position}
+            for position, course_id in enumerate(course_ids)
+        ])
+    await session.execute(update(Dialog).filter(Dialog.id == chat_id).values(roadmap_id=roadmap_id))
+    return roadmap_id
+
+
+async def save_roadmap(session: AsyncSession, chat_id: int, courses: List[dict]) -> Optional[int]:
+    """`add_roadmap` in its own transaction."""
+    roadmap_id = await add_roadmap(session, chat_id, courses)
+    await session.commit()
+    return roadmap_id
+
+
+async def user_roadmaps(session: AsyncSession, owner: int) -> List[Roadmap]:
+    """Roadmaps of the dialogs of `owner` with their courses, in two queries whatever their number."""
+    result = await session.execute(
+        select(Roadmap)
+        .join(Dialog, Dialog.roadmap_id == Roadmap.id)
+        .filter(Dialog.owner == owner)
+        .options(selectinload(Roadmap.courses))
+        .order_by(Roadmap.id)
+    )
+    return result.scalars().all()
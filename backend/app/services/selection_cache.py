@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.embedding_cache import normalize_text
+from app.utils.ttl_cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class SelectionCache:
+    """
+    Cache of LLM roadmap selections (chosen course ids).
+
+    The exact tier is keyed on the normalized profile, the constraints and the sorted candidate ids.
+    With `similarity` > 0 a miss falls back to the semantic tier: an answer for a query embedding
+    within that cosine similarity, with the same `hours` and `cost`, whose courses are all among
+    the current candidates. With `directory` set, entries are kept in `selections.json` there.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, similarity: float = 0.0, directory: str = "", flush_every: int = 20):
+        self.exact = LRUTTLCache(maxsize, ttl)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity = similarity
+        self.path = Path(directory) / "selections.json" if directory else None
+        self.flush_every = flush_every
+        # key -> (unit query vector or None, hours, cost, chosen ids, stored_at)
+        self.entries = OrderedDict()
+        self.semantic_hits = 0
+        self._writes = 0
+        self.dirty = False
+
+    @staticmethod
+    def key(area: str, current_level: str, desired_skills: str, hours: int, cost: int,
+            candidate_ids: Iterable[int]) -> str:
+        profile = "\0".join(normalize_text(text) for text in (area, current_level, desired_skills))
+        ids = ",".join(str(course_id) for course_id in sorted(candidate_ids))
+        return hashlib.sha1(f"{profile}\0{hours}\0{cost}\0{ids}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _unit(vector) -> Optional[np.ndarray]:
+        if vector is None:
+            return None
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, area: str, current_level: str, desired_skills: str, hours: int, cost: int,
+            candidate_ids: Iterable[int], vector=None) -> Optional[List[int]]:
+        candidate_ids = set(candidate_ids)
+        chosen = self.exact.get(self.key(area, current_level, desired_skills, hours, cost, candidate_ids))
+        if chosen is not None or self.similarity <= 0:
+            return chosen
+
+        unit = self._unit(vector)
+        if unit is None:
+            return None
+        best, best_similarity = None, self.similarity
+        now = time.time()
+        for entry_vector, entry_hours, entry_cost, entry_chosen, stored_at in self.entries.values():
+            if (entry_vector is None or entry_hours != hours or entry_cost != cost
+                    or now - stored_at > self.ttl or not candidate_ids.issuperset(entry_chosen)):
+                continue
+            similarity = float(entry_vector @ unit)
+            if similarity >= best_similarity:
+                best, best_similarity = entry_chosen, similarity
+        if best is not None:
+            self.semantic_hits += 1
+        return best
+
+    def set(self, area: str, current_level: str, desired_skills: str, hours: int, cost: int,
+            candidate_ids: Iterable[int], chosen_ids: List[int], vector=None):
+        if self.maxsize <= 0:
+            return
+        key = self.key(area, current_level, desired_skills, hours, cost, candidate_ids)
+        chosen_ids = list(chosen_ids)
+        self.exact.set(key, chosen_ids)
+        self.entries[key] = (self._unit(vector), hours, cost, chosen_ids, time.time())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        self.dirty = True
+        self._writes += 1
+        if self.path is not None and self._writes % self.flush_every == 0:
+            self.flush()
+
+    def load(self):
+        """Restore unexpired entries saved by an earlier run."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            saved = json.loads(self.path.read_text())
+        except ValueError:
+            logger.warning("Selection cache file is corrupted, starting from scratch")
+            return
+        now = time.time()
+        for key, (vector, hours, cost, chosen, stored_at) in saved.items():
+            if now - stored_at > self.ttl:
+                continue
+            self.exact.set(key, chosen)
+            self.entries[key] = (self._unit(vector), hours, cost, chosen, stored_at)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        logger.info(f"Loaded {len(self.entries)} cached course selections from {self.path}")
+
+    def flush(self):
+        if self.path is None or not self.dirty:
+            return
+        saved = {
+            key: (vector.tolist() if vector is not None else None, hours, cost, chosen, stored_at)
+            for key, (vector, hours, cost, chosen, stored_at) in self.entries.items()
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(saved))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def clear(self):
+        self.exact.clear()
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        stats = self.exact.stats()
+        # Exact misses served by the semantic tier count as hits
+        stats["hits"] += self.semantic_hits
+        stats["misses"] -= self.semantic_hits
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["semantic_hits"] = self.semantic_hits
+        stats["similarity"] = self.similarity
+        return stats
+
+
+selection_cache = SelectionCache(
+    maxsize=settings.selection_cache_size,
+    ttl=settings.selection_cache_ttl,
+    similarity=settings.selection_cache_similarity,
+    directory=settings.selection_cache_dir,
+)
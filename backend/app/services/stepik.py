@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Iterable, List, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class StepikClient:
+    """
+    Shared client of the public Stepik API: one pooled HTTP/2 connection pool for the whole app,
+    bounded concurrency, a token-bucket rate limit and retries with jittered backoff on 429/5xx.
+    """
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self._semaphore = None
+        self._bucket = None
+
+    async def start(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        await self.close()
+        self.client = httpx.AsyncClient(
+            base_url=settings.stepik_api_url,
+            http2=settings.stepik_http2,
+            timeout=settings.stepik_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.stepik_max_concurrency,
+                max_keepalive_connections=settings.stepik_max_concurrency,
+            ),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(settings.stepik_max_concurrency)
+        self._bucket = TokenBucket(settings.stepik_rate_limit, settings.stepik_rate_burst)
+        logger.info(f"Stepik client started: {settings.stepik_api_url}")
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get_json(self, path: str, params: Optional[dict] = None) -> dict:
+        if self.client is None:
+            await self.start()
+
+        for attempt in range(settings.stepik_max_retries + 1):
+            async with self._semaphore:
+                await self._bucket.acquire()
+                try:
+                    response = await self.client.get(path, params=params)
+                except httpx.TransportError as e:
+                    if attempt == settings.stepik_max_retries:
+                        raise
+                    logger.warning(f"Stepik request {path} failed: {e!r}, retrying")
+                    response = None
+
+            if response is not None:
+                if response.status_code not in RETRY_STATUSES or attempt == settings.stepik_max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                logger.warning(f"Stepik request {path} returned {response.status_code}, retrying")
+
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Full jitter
+        return random.uniform(0, settings.stepik_backoff_base * 2 ** attempt)
+
+    async def course_list_ids(self) -> set:
+        ids = set()
+        page = 1
+        while True:
+            logger.info(f"Getting page courses list: {page}")
+            course_lists = await self.get_json("course-lists", params={"page": page})
+            for section in course_lists["course-lists"]:
+                logger.info(f"Getting courses from: {section['title']}")
+                ids.update(section["courses"])
+            if not course_lists["meta"]["has_next"]:
+                return ids
+            page += 1
+
+    async def course_recommendations(self) -> List[int]:
+        return (await self.get_json("course-recommendations"))["course-recommendations"][0]["courses"]
+
+    async def courses(self, ids: Iterable[int]) -> List[dict]:
+        return (await self.get_json("courses", params={"ids[]": list(ids)}))["courses"]
+
+    async def review_summaries(self, ids: Iterable[int]) -> List[dict]:
+        return (await self.get_json("course-review-summaries", params={"ids[]": list(ids)}))["course-review-summaries"]
+
+    async def users(self, ids: Iterable[int]) -> List[dict]:
+        return (await self.get_json("users", params={"ids[]": list(ids)}))["users"]
+
+    async def courses_with_details(self, ids: Iterable[int]):
+        """Fetch courses and then their review summaries and authors in parallel."""
+        courses = await self.courses(ids)
+        review_ids = [course["review_summary"] for course in courses if course["review_summary"]]
+        author_ids = list({author_id for course in courses for author_id in course["authors"]})
+        reviews, authors = await asyncio.gather(self.review_summaries(review_ids), self.users(author_ids))
+        return courses, reviews, authors
+
+
+stepik = StepikClient()
@@ -1,10 +1,11 @@
 import httpx
 from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
-from app.services.database import session
 
-async def user_info(id: int):
-    user = session.query(User).get(id)
+async def user_info(session: AsyncSession, id: int):
+    user = await session.get(User, id)
     return user
 
 # FROM STEPIK
@@ -18,22 +19,22 @@ async def fetch_user_info(access_token: str):
     
     return response.json().get('users', [])
 
-async def get_or_create_user(stepik_user_info, code: str, access_token: str):
+async def get_or_create_user(session: AsyncSession, stepik_user_info, code: str, access_token: str):
     if not stepik_user_info:
         raise HTTPException(status_code=400, detail="User information not found")
 
     user_data = stepik_user_info[0]
     stepik_id = user_data['id']
     
-    user = session.query(User).filter_by(stepik_id=stepik_id).first()
+    user = (await session.execute(select(User).filter_by(stepik_id=stepik_id))).scalars().first()
     
     if user:
         user.first_name = user_data['first_name']
         user.last_name = user_data['last_name']
-        user.avatar = user_data['avatar'],
-        user.code = code,
+        user.avatar = user_data['avatar']
+        user.code = code
         user.access_token = access_token
-        session.commit()
+        await session.commit()
     else:
         user = User(
             first_name=user_data['first_name'],
@@ -44,7 +45,7 @@ async def get_or_create_user(stepik_user_info, code: str, access_token: str):
             access_token = access_token
         )
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
 
     return {"sub": str(user.id)}
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services import database
+
+logger = logging.getLogger(__name__)
+
+# A write: gets a session and adds its changes without committing
+Job = Callable[[AsyncSession], Awaitable]
+
+
+class WriteBehindQueue:
+    """
+    Background persistence of writes the response does not depend on.
+
+    Jobs go to a bounded queue (`submit` waits while it is full, so producers slow down to the
+    database speed) and one worker applies them in FIFO order, up to `batch_size` jobs per
+    transaction. A single worker keeps the order of writes to the same dialog. If a batch fails,
+    its jobs are retried one by one so that one bad write doesn't lose the others. `stop` drains
+    the queue before returning.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int,
+                 session_factory: Optional[Callable[[], AsyncSession]] = None):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self.queue: Optional[asyncio.Queue] = None
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.total_flush_ms = 0.0
+        self.last_error: Optional[str] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, job: Job):
+        await self.queue.put(job)
+        self.submitted += 1
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _session(self) -> AsyncSession:
+        return (self.session_factory or database.Session)()
+
+    async def _flush(self, batch: List[Job]):
+        started = time.perf_counter()
+        try:
+            async with self._session() as session:
+                for job in batch:
+                    await job(session)
+                await session.commit()
+            self.written += len(batch)
+        except Exception as e:
+            logger.warning(f"Write-behind batch of {len(batch)} failed, retrying one by one: {e!r}")
+            for job in batch:
+                try:
+                    async with self._session() as session:
+                        await job(session)
+                        await session.commit()
+                    self.written += 1
+                except Exception as e:
+                    self.failed += 1
+                    self.last_error = repr(e)
+                    logger.exception("Write-behind job failed")
+        self.batches += 1
+        self.total_flush_ms += (time.perf_counter() - started) * 1000
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Wait until every submitted job is written (at most `timeout` seconds), then stop the worker."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Write-behind queue not drained in {timeout} s, {self.queue.qsize()} writes lost")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "max_queued": self.maxsize,
+            "submitted": self.submitted,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_ms": self.total_flush_ms / self.batches if self.batches else None,
+            "last_error": self.last_error,
+        }
+
+
+write_behind = WriteBehindQueue(settings.write_behind_queue_size, settings.write_behind_batch_size)
@@ -1,29 +1,6 @@
-import os
-import dotenv
-from openai import OpenAI
+from app.services.deepseek import deepseek
 
-dotenv.load_dotenv()
 
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-
-def call_deepseek(prompt, system_prompt=None):
-    if not DEEPSEEK_API_KEY:
-        raise ValueError("DEEPSEEK_API_KEY environment variable is not set")
-    
-    # Initialize OpenAI client with DeepSeek API endpoint
-    client = OpenAI(
-        api_key=DEEPSEEK_API_KEY,
-        base_url="https://api.deepseek.com"
-    )
-    
-    # Create the chat completion
-    response = client.chat.completions.create(
-        model="deepseek-chat",
-        messages=[
-            {"role": "system", "content": system_prompt or "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        stream=False
-    )
-    
-    return response.choices[0].message.content 
\ No newline at end of file
+async def call_deepseek(prompt, system_prompt=None, json_mode=False):
+    """Chat completion through the shared DeepseekService client (its timeouts and circuit breaker)."""
+    return await deepseek.complete(prompt, system_prompt=system_prompt, json_mode=json_mode)
@@ -0,0 +1,64 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Words with technology-name suffixes kept whole: "c++", "c#", "node.js"
+TOKEN_RE = re.compile(r"\w+(?:[#+]+|\.\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 ranking; documents can be added, replaced and removed one by one."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {doc id: term frequency}
+        self.lengths: Dict[int, int] = {}  # doc id -> number of tokens
+        self.terms: Dict[int, List[str]] = {}  # doc id -> distinct terms, to remove the document
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id: int, text: str):
+        if doc_id in self.lengths:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        frequencies = Counter(tokens)
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+        self.terms[doc_id] = list(frequencies)
+        self.lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: int):
+        if doc_id not in self.lengths:
+            return
+        for term in self.terms.pop(doc_id):
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(doc_id)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """Up to `limit` (doc id, score) pairs with the highest BM25 score for `query`."""
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        avg_length = self.total_length / count or 1
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, frequency in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
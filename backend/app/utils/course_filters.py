@@ -0,0 +1,30 @@
+from qdrant_client import models
+
+
+def course_filter(hours: int, cost: int) -> models.Filter:
+    """
+    Qdrant filter of courses a user can take: not longer than `hours`,
+    and either free or paid in RUB and not more expensive than `cost`.
+    """
+    return models.Filter(
+        must=[
+            models.FieldCondition(key="duration", range=models.Range(lte=hours)),
+            models.Filter(
+                should=[
+                    models.FieldCondition(key="price", match=models.MatchValue(value=0)),
+                    models.Filter(
+                        must=[
+                            models.FieldCondition(key="currency_code", match=models.MatchValue(value="RUB")),
+                            models.FieldCondition(key="price", range=models.Range(lte=cost)),
+                        ]
+                    ),
+                ]
+            ),
+        ]
+    )
+
+
+def course_fits(course: dict, hours: int, cost: int) -> bool:
+    """The same condition as `course_filter`, checked in Python."""
+    price = float(course["price"])
+    return (price == 0 or course["currency_code"] == "RUB" and price <= cost) and float(course["duration"]) <= hours
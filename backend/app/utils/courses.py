@@ -0,0 +1,45 @@
+from typing import Dict, List
+
+
+def course_from_stepik(course_info: dict) -> dict:
+    """Turn a Stepik `courses` item into a `CourseSummary` dict with default rating and no authors resolved."""
+    return {
+        "id": course_info["id"],
+        "cover_url": course_info["cover"],
+        "title": course_info["title"],
+        "duration": int(course_info["time_to_complete"] / 3600) if course_info["time_to_complete"] else 0,
+        "difficulty": course_info["difficulty"],
+        "price": 0 if course_info["price"] is None else int(float(course_info["price"])),
+        "currency_code": course_info["currency_code"],
+        "pupils_num": course_info["learners_count"],
+        "authors": "",
+        "rating": 5,
+        "url": f"https://stepik.org/course/{course_info['id']}/promo",
+        "description": course_info["description"],
+        "summary": course_info["summary"],
+        "target_audience": course_info["target_audience"],
+        "acquired_skills": ''.join(course_info["acquired_skills"]),
+        "acquired_assets": ''.join(course_info["acquired_assets"]),
+        "title_en": course_info["title_en"],
+        "learning_format": course_info["learning_format"],
+    }
+
+
+def normalize_courses(courses_info: List[dict], reviews: List[dict], authors: List[dict]) -> Dict[int, dict]:
+    """
+    Build `CourseSummary` dicts keyed by course id from Stepik `courses`, `course-review-summaries`
+    and `users` payloads. Ratings and authors are looked up in id-keyed dicts, so the whole page
+    is resolved in linear time. All authors of a course are joined with ", ".
+    """
+    ratings = {review["course"]: int(review["average"]) for review in reviews}
+    author_names = {author["id"]: author["full_name"] for author in authors}
+
+    courses = {}
+    for course_info in courses_info:
+        course = course_from_stepik(course_info)
+        course["rating"] = ratings.get(course["id"], course["rating"])
+        course["authors"] = ", ".join(
+            author_names[author_id] for author_id in course_info["authors"] if author_id in author_names
+        )
+        courses[course["id"]] = course
+    return courses
@@ -0,0 +1,32 @@
+import re
+from typing import Dict, List, Sequence
+
+# Damping constant of reciprocal-rank fusion; 60 is the usual choice
+RRF_K = 60
+
+SKILL_SEPARATORS = re.compile(r"[,;/\n]|\s+(?:и|and)\s+", re.IGNORECASE)
+
+
+def split_skills(desired_skills: str) -> List[str]:
+    """'Python, SQL и pandas' -> ['Python', 'SQL', 'pandas']"""
+    skills = []
+    for skill in SKILL_SEPARATORS.split(desired_skills):
+        skill = skill.strip(" .")
+        if skill and skill.lower() not in (known.lower() for known in skills):
+            skills.append(skill)
+    return skills
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[list], k: int = RRF_K) -> list:
+    """
+    Merge ranked lists of Qdrant points into one list deduplicated by id, ordered by the sum of
+    1 / (k + rank) over the lists. Each point keeps its best score, so scores stay similarities.
+    """
+    fused: Dict[int, float] = {}
+    best = {}
+    for points in result_lists:
+        for rank, point in enumerate(points, 1):
+            fused[point.id] = fused.get(point.id, 0.0) + 1 / (k + rank)
+            if point.id not in best or best[point.id].score < point.score:
+                best[point.id] = point
+    return [best[point_id] for point_id in sorted(fused, key=fused.get, reverse=True)]
@@ -0,0 +1,76 @@
+import math
+import re
+from typing import List, Sequence, Tuple
+
+# Rough tokenizer-free estimate; Cyrillic text takes more tokens per character than English
+CHARS_PER_TOKEN = 3.0
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Cut `text` to about `max_tokens` at a word boundary."""
+    text = re.sub(r"\s+", " ", text or "").strip()
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0] if " " in text[:max_chars] else text[:max_chars]
+    return cut.rstrip(",.;:") + "…"
+
+
+def course_line(idx: int, course: dict, summary_tokens: int) -> str:
+    return (f"{idx}. {truncate(course['title'], summary_tokens)} | {course['difficulty']} | "
+            f"learners {course['pupils_num']} | {course['duration']} h | "
+            f"{course['price']} {course['currency_code']} | {truncate(course['summary'], summary_tokens)}")
+
+
+def roadmap_prompt(area: str, current_level: str, desired_skills: str, hours: int, cost: int,
+                   courses: Sequence[dict], max_tokens: int, summary_tokens: int,
+                   max_candidates: int) -> Tuple[str, List[dict]]:
+    """
+    Prompt asking the LLM for a roadmap out of `courses`, which must be ordered from the most relevant.
+    Course summaries are cut to `summary_tokens`, and courses are added while the prompt stays
+    within `max_tokens` and `max_candidates`.
+    Returns the prompt and the courses it lists; the indexes in the answer refer to the latter.
+    """
+    header = (
+        "You are a course recommender AI. Select up to 5 of the courses below that together form "
+        "a coherent learning roadmap for the user.\n\n"
+        "User's learning profile:\n"
+        f"- Goal: {area}\n"
+        f"- Current level: {current_level}\n"
+        f"- Desired skills to acquire: {desired_skills}\n"
+        f"- Maximum total time to complete all courses in hours: {hours}\n"
+        f"- Maximum total cost of all courses in RUB: {cost}\n\n"
+        "!!! IMPORTANT CONSTRAINTS (must follow strictly) !!!\n"
+        "- DO NOT INCLUDE ANY COURSE if its price is greater than 0 AND the user's budget is 0.\n"
+        f"- Total duration of selected courses must NOT exceed {hours} hours.\n"
+        f"- Total price in RUB of selected courses must NOT exceed {cost} RUB.\n\n"
+        "Courses (index. title | difficulty | learners | duration | price currency | summary):"
+    )
+    footer = (
+        "\n\nYour task:"
+        "\n- The roadmap should make sense in order — start with foundational topics and build toward more advanced ones."
+        "\n- Avoid overlapping or redundant content."
+        "\n- Only include courses that are clearly relevant to the user's goals."
+        "\n- Among equally suitable options, prefer those with more learners (as a proxy for quality)."
+        "\n- If fewer than 5 courses are needed to build a roadmap, return only those."
+        "\n\nReturn a Python list of the selected course indexes in the recommended order of completion."
+        "\nOnly return the list, like this: [2, 7, 10] (no explanations)."
+    )
+
+    lines = [header]
+    tokens = estimate_tokens(header) + estimate_tokens(footer)
+    included = []
+    for course in courses[:max_candidates]:
+        line = course_line(len(included), course, summary_tokens)
+        line_tokens = estimate_tokens(line) + 1
+        if included and tokens + line_tokens > max_tokens:
+            break
+        lines.append(line)
+        tokens += line_tokens
+        included.append(course)
+    lines.append(footer)
+    return "\n".join(lines), included
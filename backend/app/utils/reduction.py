@@ -0,0 +1,77 @@
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def vector_model() -> str:
+    """Name of the vector space: the embedding model plus the reduction, if any. Vectors of different spaces never mix."""
+    if settings.embedding_dim <= 0:
+        return settings.embedding_model
+    return f"{settings.embedding_model}|{settings.embedding_reduction}-{settings.embedding_dim}"
+
+
+def fit_pca(vectors: np.ndarray, dim: int):
+    """Mean and the top `dim` principal components (rows) of `vectors`."""
+    mean = vectors.mean(axis=0)
+    _, _, components = np.linalg.svd(vectors - mean, full_matrices=False)
+    return mean.astype(np.float32), components[:dim].astype(np.float32)
+
+
+class DimensionReducer:
+    """
+    Reduces embeddings to `dim` dimensions and normalizes them, either by keeping the first
+    dimensions ("truncate", Matryoshka style) or by projecting on principal components ("pca")
+    stored in `pca_path`. With `dim` <= 0 vectors are returned unchanged.
+    """
+
+    def __init__(self, dim: int, method: str = "truncate", pca_path: str = ""):
+        self.dim = dim
+        self.method = method
+        self.pca_path = Path(pca_path) if pca_path else None
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.dim > 0
+
+    def output_dim(self, model_dim: int) -> int:
+        return min(self.dim, model_dim) if self.enabled else model_dim
+
+    def load(self):
+        if not self.enabled or self.method != "pca":
+            return
+        if self.pca_path is None or not self.pca_path.exists():
+            raise RuntimeError(f"PCA components for embedding reduction not found at '{self.pca_path}', "
+                               f"fit them with benchmarks/quantization_recall.py --save-pca")
+        saved = np.load(self.pca_path)
+        if saved["components"].shape[0] < self.dim:
+            raise RuntimeError(f"PCA components at '{self.pca_path}' have fewer than {self.dim} dimensions")
+        self.mean, self.components = saved["mean"], saved["components"][:self.dim]
+        logger.info(f"Loaded PCA components from {self.pca_path}")
+
+    def fit(self, vectors: np.ndarray):
+        self.mean, self.components = fit_pca(np.asarray(vectors, dtype=np.float32), self.dim)
+
+    def save(self):
+        self.pca_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(self.pca_path, mean=self.mean, components=self.components)
+
+    def __call__(self, vectors: np.ndarray) -> np.ndarray:
+        if not self.enabled:
+            return vectors
+        vectors = np.asarray(vectors, dtype=np.float32)
+        matrix = np.atleast_2d(vectors)
+        if self.method == "pca":
+            reduced = (matrix - self.mean) @ self.components.T
+        else:
+            reduced = matrix[:, :self.dim]
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        reduced = reduced / np.where(norms == 0, 1, norms)
+        return reduced[0] if vectors.ndim == 1 else reduced
@@ -0,0 +1,111 @@
+import math
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.course_filters import course_fits
+
+# Weights of the relevance score
+SIMILARITY_WEIGHT = 0.7
+POPULARITY_WEIGHT = 0.2
+RATING_WEIGHT = 0.1
+# Trade-off between relevance and novelty in MMR (1 - relevance only)
+MMR_LAMBDA = 0.7
+# Most relevant feasible candidates that MMR picks from
+SHORTLIST_SIZE = 30
+# Candidates considered by the knapsack after MMR
+POOL_SIZE = 15
+
+DIFFICULTY_ORDER = {
+    "easy": 0, "beginner": 0,
+    "normal": 1, "medium": 1, "intermediate": 1,
+    "hard": 2, "advanced": 2,
+}
+
+
+def relevance_scores(courses: Sequence[dict], similarities: Sequence[float]) -> List[float]:
+    """Blend of query similarity, popularity (log of learners, relative to the most popular candidate) and rating."""
+    max_pupils = max((math.log1p(course.get("pupils_num") or 0) for course in courses), default=0) or 1
+    return [
+        SIMILARITY_WEIGHT * similarity
+        + POPULARITY_WEIGHT * math.log1p(course.get("pupils_num") or 0) / max_pupils
+        + RATING_WEIGHT * (course.get("rating") or 0) / 5
+        for course, similarity in zip(courses, similarities)
+    ]
+
+
+def mmr(relevance: Sequence[float], vectors: Optional[np.ndarray], size: int) -> List[tuple]:
+    """
+    Maximal marginal relevance ordering of the top `size` items.
+    Returns (index, marginal utility) pairs; without vectors this is plain relevance order.
+    """
+    order = sorted(range(len(relevance)), key=lambda i: relevance[i], reverse=True)
+    if vectors is None:
+        return [(i, relevance[i]) for i in order[:size]]
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    selected = []
+    max_sim = np.zeros(len(relevance))
+    remaining = set(order)
+    while remaining and len(selected) < size:
+        best = max(remaining, key=lambda i: MMR_LAMBDA * relevance[i] - (1 - MMR_LAMBDA) * max_sim[i])
+        selected.append((best, MMR_LAMBDA * relevance[best] - (1 - MMR_LAMBDA) * max_sim[best]))
+        remaining.remove(best)
+        max_sim = np.maximum(max_sim, unit @ unit[best])
+    return selected
+
+
+def knapsack(items: Sequence[tuple], durations: Sequence[int], prices: Sequence[int],
+             hours: int, cost: int, k: int) -> List[int]:
+    """
+    0/1 knapsack with two budgets (hours and RUB) and at most `k` items.
+    `items` are (index, utility) pairs; returns the indexes of the best feasible subset.
+    """
+    # (count, hours, price) -> (utility, chosen indexes)
+    states: Dict[tuple, tuple] = {(0, 0, 0): (0.0, ())}
+    for index, utility in items:
+        gain = max(utility, 0.0) + 1e-6  # every feasible course is worth adding
+        for (count, used_hours, used_price), (total, chosen) in list(states.items()):
+            state = (count + 1, used_hours + durations[index], used_price + prices[index])
+            if state[0] > k or state[1] > hours or state[2] > cost:
+                continue
+            if states.get(state, (-1.0,))[0] < total + gain:
+                states[state] = (total + gain, chosen + (index,))
+    return list(max(states.values(), key=lambda value: value[0])[1])
+
+
+def shortlist(courses: Sequence[dict], similarities: Sequence[float], hours: int, cost: int,
+              size: int = SHORTLIST_SIZE) -> List[tuple]:
+    """The `size` most relevant courses that fit the budgets, as (course, relevance) pairs."""
+    feasible = [(course, similarity) for course, similarity in zip(courses, similarities)
+                if course_fits(course, hours, cost)]
+    relevance = relevance_scores([course for course, _ in feasible], [similarity for _, similarity in feasible])
+    ranked = sorted(zip((course for course, _ in feasible), relevance), key=lambda pair: pair[1], reverse=True)
+    return ranked[:size]
+
+
+def select_courses(courses: Sequence[dict], similarities: Sequence[float], hours: int, cost: int,
+                   vectors: Optional[Dict[int, np.ndarray]] = None, k: int = 5) -> List[dict]:
+    """
+    Deterministic local roadmap: up to `k` courses that fit the user's total time and RUB budget,
+    chosen by relevance with MMR diversity over course embeddings (`vectors` by course id, optional)
+    and ordered from easy to hard.
+    """
+    candidates = shortlist(courses, similarities, hours, cost)
+    if not candidates:
+        return []
+    courses = [course for course, _ in candidates]
+    relevance = [score for _, score in candidates]
+
+    matrix = None
+    if vectors and all(course["id"] in vectors for course in courses):
+        matrix = np.array([vectors[course["id"]] for course in courses], dtype=np.float32)
+    ranked = mmr(relevance, matrix, POOL_SIZE)
+    rank = {index: position for position, (index, _) in enumerate(ranked)}
+
+    durations = [int(course.get("duration") or 0) for course in courses]
+    prices = [int(float(course.get("price") or 0)) for course in courses]
+    chosen = knapsack(ranked, durations, prices, hours, cost, k)
+    chosen.sort(key=lambda i: (DIFFICULTY_ORDER.get(str(courses[i].get("difficulty")).lower(), 1), rank[i]))
+    return [courses[i] for i in chosen]
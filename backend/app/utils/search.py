@@ -1,88 +1,183 @@
+import asyncio
 import logging
+from typing import List, Optional, Tuple
 
+import numpy as np
 from fastapi import HTTPException
 
+from app.config import settings
 from app.schemas.course import CourseSearchRequest
 from app.services import deepseek, encoder, qdrant
+from app.services.qdrant import SEARCH_PAYLOAD_FIELDS
+from app.services.selection_cache import selection_cache
 from app.utils import query_logger
+from app.utils.course_filters import course_filter
+from app.utils.fusion import reciprocal_rank_fusion, split_skills
+from app.utils.roadmap_optimizer import select_courses, shortlist
 
 logger = logging.getLogger(__name__)
 
 
-async def get_courses_v2(payload: CourseSearchRequest):
+async def choose_with_llm(payload: CourseSearchRequest, courses: List[dict], scores: List[float],
+                          vector=None) -> Optional[List[dict]]:
+    """
+    Hedged deepseek selection bounded by `llm_selection_timeout`; None if it gave no roadmap.
+    The prompt gets the `llm_max_candidates` most relevant courses.
+    Selections are cached by profile and candidates, or by a close query `vector`.
+    """
+    profile = (payload.area, payload.current_level, payload.desired_skills, payload.hours, payload.cost)
+    candidate_ids = [course["id"] for course in courses]
+    chosen_ids = selection_cache.get(*profile, candidate_ids, vector=vector)
+    if chosen_ids is not None:
+        logger.info("Course selection cache hit")
+        by_id = {course["id"]: course for course in courses}
+        return [by_id[course_id] for course_id in chosen_ids if course_id in by_id]
+
+    ranked = [course for course, _ in
+              shortlist(courses, scores, payload.hours, payload.cost, size=settings.llm_max_candidates)]
+    try:
+        chosen = await asyncio.wait_for(
+            deepseek.choose_courses(payload.area, payload.current_level, payload.desired_skills,
+                                    payload.hours, payload.cost, ranked),
+            timeout=settings.llm_selection_timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"Deepseek did not choose courses in {settings.llm_selection_timeout}s")
+        return None
+    if chosen:
+        selection_cache.set(*profile, candidate_ids, [course["id"] for course in chosen], vector=vector)
+    return chosen
+
+
+async def select_locally(courses: List[dict], scores: List[float], hours: int, cost: int) -> List[dict]:
+    """Roadmap chosen by the local optimizer, diversified with the shortlisted courses' vectors when Qdrant has them."""
+    vectors = None
+    try:
+        candidates = shortlist(courses, scores, hours, cost)
+        vectors = await qdrant.vectors([course["id"] for course, _ in candidates])
+    except Exception as e:
+        logger.warning(f"Course vectors are not available, choosing without diversity: {str(e)}")
+    return select_courses(courses, scores, hours, cost, vectors=vectors)
+
+
+async def choose_locally(payload: CourseSearchRequest, courses: List[dict], scores: List[float]) -> List[dict]:
+    return await select_locally(courses, scores, payload.hours, payload.cost)
+
+
+def profile_queries(payload: CourseSearchRequest) -> List[str]:
+    """The whole profile followed by one query per desired skill (up to `search_max_subqueries`)."""
+    query = payload.area + " " + payload.current_level + " " + payload.desired_skills
+    queries = [query]
+    for skill in split_skills(payload.desired_skills)[:settings.search_max_subqueries]:
+        subquery = f"{payload.area} {skill}"
+        if subquery not in queries:
+            queries.append(subquery)
+    return queries
+
+
+async def search_points(payload: CourseSearchRequest, query: str, query_filter) -> Tuple[np.ndarray, list]:
+    """
+    Query vector and ranked points. In `fanout` mode every query of `profile_queries` is encoded in one batch,
+    searched in one batch request and the results are merged with reciprocal-rank fusion.
+    With `search_hybrid` BM25 hits for `query` are fused in as well.
+    """
+    if settings.search_mode == "fanout":
+        vectors = await encoder.vectorize_many(profile_queries(payload))
+    else:
+        vectors = [await encoder.vectorize(query)]
+
+    if settings.search_hybrid:
+        return vectors[0], await qdrant.hybrid_search(query, vectors, "courses", limit=100, query_filter=query_filter,
+                                                      with_payload=SEARCH_PAYLOAD_FIELDS)
+    if len(vectors) == 1:
+        return vectors[0], await qdrant.search(vectors[0], "courses", limit=100, query_filter=query_filter,
+                                               with_payload=SEARCH_PAYLOAD_FIELDS)
+    results = await qdrant.search_batch(vectors, "courses", limit=100, query_filter=query_filter,
+                                        with_payload=SEARCH_PAYLOAD_FIELDS)
+    return vectors[0], reciprocal_rank_fusion(results)[:100]
+
+
+async def search_candidates(payload: CourseSearchRequest) -> Tuple[Optional[np.ndarray], List[dict], List[float]]:
+    """
+    Courses the user can afford in time and money, the most relevant to the profile first.
+    Returns the query vector, the courses (search payload projection) and their similarity scores.
+    """
+    all_results = []
+    scores = []
+    vector = None
+    min_threshold = 0  # Lowered threshold to capture more relevant courses
+    query = payload.area + " " + payload.current_level + " " + payload.desired_skills
     try:
-        all_results = []
-        min_threshold = 0  # Lowered threshold to capture more relevant courses
-        query = payload.area + " " + payload.current_level + " " + payload.desired_skills
-        try:
-            vector = await encoder.vectorize(query)
-            results = await qdrant.search(vector, "courses", limit=100)  # Get 100 results
+        # Get 100 results the user can afford in time and money
+        vector, results = await search_points(payload, query, course_filter(payload.hours, payload.cost))
+
+        # Log search results with similarity scores
+        query_logger.log_search_results(query, results, min_threshold)
 
-            # Log search results with similarity scores
-            query_logger.log_search_results(query, results, min_threshold)
+        if results and len(results) > 0:
+            # Find multiple good courses from this query that meet the threshold
+            good_courses = []
 
-            if results and len(results) > 0:
-                # Find multiple good courses from this query that meet the threshold
-                good_courses = []
+            for result in results:
+                course = result.payload
+                similarity_score = result.score
 
-                for result in results:
-                    course = result.payload
-                    similarity_score = result.score
+                logger.info(
+                    f"Query '{query}' found course '{course['title']}' with similarity score: {similarity_score}")
 
+                # Check if this course meets minimum threshold
+                if similarity_score >= min_threshold:
+                    # Only consider if we haven't seen this course before
+                    good_courses.append((course, similarity_score))
                     logger.info(
-                        f"Query '{query}' found course '{course['title']}' with similarity score: {similarity_score}")
-
-                    # Check if this course meets minimum threshold
-                    if similarity_score >= min_threshold:
-                        # Only consider if we haven't seen this course before
-                        good_courses.append((course, similarity_score))
-                        logger.info(
-                            f"Good course found for query '{query}': '{course['title']}' (score: {similarity_score})")
-                    else:
-                        logger.info(
-                            f"Course '{course['title']}' rejected due to low similarity score: {similarity_score} < {min_threshold}")
-
-                # Sort by similarity score and take up to 2 best courses per query
-                good_courses.sort(key=lambda x: x[1], reverse=True)
-                courses_to_add = good_courses
-
-                for course, score in courses_to_add:
-                    all_results.append(course)
-                    logger.info(f"Added course from query '{query}': '{course['title']}' (score: {score})")
-
-                if not courses_to_add:
+                        f"Good course found for query '{query}': '{course['title']}' (score: {similarity_score})")
+                else:
                     logger.info(
-                        f"No suitable courses found for query '{query}' (all below {min_threshold} threshold)")
-            else:
-                logger.info(f"No results found for query: {query}")
-
-        except Exception as e:
-            logger.warning(f"Error searching for query '{query}': {str(e)}")
-
-        # If we have too many results, prioritize by similarity score
-        flag = True
-        if len(all_results) > 5:
-            logger.info(f"Found {len(all_results)} courses, limiting to top 5 by deepseek mind")
-            # Sort all results by their similarity scores (we'll need to track this)
-            # For now, just take the first 5
-            for attempt2 in range(3):
-                res = await deepseek.choose_courses(payload.area, payload.current_level, payload.desired_skills,
-                                                    payload.hours, payload.cost, attempt2,
-                                                    all_results)
-                if res is not None:
-                    all_results = res
-                    flag = False
-                    break
-        if flag:
-            logger.info("No search results found")
-            return []
-        if all_results:
-            logger.info(
-                f"Found {len(all_results)} unique courses from {1} queries (min threshold: {min_threshold})")
-            return all_results
+                        f"Course '{course['title']}' rejected due to low similarity score: {similarity_score} < {min_threshold}")
+
+            # Results are already ranked, by similarity or by fusion of the sub-queries
+            for course, score in good_courses:
+                all_results.append(course)
+                scores.append(score)
+                logger.info(f"Added course from query '{query}': '{course['title']}' (score: {score})")
+
+            if not good_courses:
+                logger.info(
+                    f"No suitable courses found for query '{query}' (all below {min_threshold} threshold)")
         else:
-            logger.warning(
-                f"No search results found that meet minimum threshold {min_threshold} (attempt {1})")
+            logger.info(f"No results found for query: {query}")
+
+    except Exception as e:
+        logger.warning(f"Error searching for query '{query}': {str(e)}")
+
+    if not all_results:
+        logger.warning(f"No search results found that meet minimum threshold {min_threshold}")
+    return vector, all_results, scores
+
+
+async def choose_roadmap(payload: CourseSearchRequest, courses: List[dict], scores: List[float],
+                         vector=None) -> List[dict]:
+    """Up to 5 of the candidate `courses` in the order of completion, by deepseek or the local optimizer."""
+    chosen = None
+    # If we have too many results, let deepseek build the roadmap
+    if len(courses) > 5 and not payload.fast:
+        logger.info(f"Found {len(courses)} courses, limiting to top 5 by deepseek mind")
+        chosen = await choose_with_llm(payload, courses, scores, vector)
+    if not chosen:
+        logger.info(f"Choosing from {len(courses)} courses with the local optimizer")
+        chosen = await choose_locally(payload, courses, scores)
+    logger.info(f"Chose {len(chosen)} courses out of {len(courses)}")
+    return chosen
+
+
+async def get_courses_v2(payload: CourseSearchRequest):
+    try:
+        vector, all_results, scores = await search_candidates(payload)
+        if not all_results:
+            return []
+        chosen = await choose_roadmap(payload, all_results, scores, vector)
+        # Only the chosen courses need their full payload
+        return await qdrant.hydrate(chosen)
     except Exception as e:
         logger.exception(f"Error course searching: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SWRCache:
+    """
+    Single-value stale-while-revalidate cache.
+
+    `get` always answers from memory once a value is loaded; a stale value (older than `max_age`)
+    triggers a refresh in the background. Only one refresh runs at a time: concurrent callers
+    share the in-flight one. `start` additionally refreshes the value every `refresh_interval` seconds.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Awaitable[Any]], max_age: float, refresh_interval: float):
+        self.name = name
+        self.loader = loader
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.value = None
+        self.updated_at: Optional[float] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh_ms: Optional[float] = None
+        self.total_refresh_ms = 0.0
+        self.last_error: Optional[str] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.updated_at is None else time.monotonic() - self.updated_at
+
+    async def get(self):
+        if self.updated_at is None:
+            return await self.refresh()
+        if self.age > self.max_age:
+            self._ensure_refresh()
+        return self.value
+
+    async def refresh(self):
+        return await asyncio.shield(self._ensure_refresh())
+
+    def _ensure_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+        return self._refresh_task
+
+    async def _refresh(self):
+        started = time.perf_counter()
+        try:
+            value = await self.loader()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = repr(e)
+            logger.exception(f"Error refreshing '{self.name}' cache")
+            if self.updated_at is None:
+                raise
+            return self.value
+        duration_ms = (time.perf_counter() - started) * 1000
+        self.value = value
+        self.updated_at = time.monotonic()
+        self.refreshes += 1
+        self.last_refresh_ms = duration_ms
+        self.total_refresh_ms += duration_ms
+        self.last_error = None
+        logger.info(f"Cache '{self.name}' refreshed in {duration_ms:.0f} ms")
+        return value
+
+    def start(self):
+        self._loop_task = asyncio.get_running_loop().create_task(self._refresh_forever())
+
+    async def _refresh_forever(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                pass  # Already logged, the next request or tick retries
+            await asyncio.sleep(self.refresh_interval)
+
+    async def stop(self):
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._loop_task = self._refresh_task = None
+
+    def clear(self):
+        self.value = None
+        self.updated_at = None
+        self._refresh_task = None
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.updated_at is not None,
+            "age_seconds": self.age,
+            "max_age_seconds": self.max_age,
+            "refresh_interval_seconds": self.refresh_interval,
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_refresh_ms": self.last_refresh_ms,
+            "avg_refresh_ms": self.total_refresh_ms / self.refreshes if self.refreshes else None,
+            "last_error": self.last_error,
+        }
@@ -57,7 +57,7 @@ def test_config():
     return bool(settings.deepseek_api_key)
 
 
-def test_ai_utils():
+async def test_ai_utils():
     """Test the ai_utils call_deepseek function"""
     print("\n" + "=" * 60)
     print("3. TESTING AI_UTILS FUNCTION")
@@ -67,7 +67,7 @@ def test_ai_utils():
     
     try:
         print(f"Testing prompt: {test_prompt}")
-        response = call_deepseek(test_prompt)
+        response = await call_deepseek(test_prompt)
         
         print(f"✓ Success! Response length: {len(response)} characters")
         print(f"Response preview: {response[:200]}...")
@@ -138,7 +138,7 @@ async def run_all_tests():
     
     # Test 3: AI Utils (only if we have API key)
     if settings.deepseek_api_key:
-        results['ai_utils'], ai_response = test_ai_utils()
+        results['ai_utils'], ai_response = await test_ai_utils()
     else:
         results['ai_utils'] = False
         print("\n" + "=" * 60)
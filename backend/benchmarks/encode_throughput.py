@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Encoder throughput benchmark
+
+Compares the old ingestion path (one model call per course) with the batched
+`encoder.vectorize_batch` path used by `loadCourses` and reports texts/sec for both.
+The per-text baseline calls the model directly, so the query micro-batcher and the
+embedding cache (which `encoder.vectorize` goes through) don't affect it.
+
+Usage:
+    python backend/benchmarks/encode_throughput.py [--texts 200] [--batch-size 32] [--no-sort]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.services.encoder import encoder
+from app.services.qdrant import course_text
+
+WORDS = (
+    "python данные анализ машинное обучение sql основы программирования веб разработка "
+    "алгоритмы статистика нейронные сети django pandas визуализация базы данных "
+    "математика java kotlin android тестирование"
+).split()
+
+
+def make_courses(n: int):
+    rnd = random.Random(42)
+    return [
+        {
+            "title": " ".join(rnd.choices(WORDS, k=rnd.randint(2, 6))),
+            "title_en": " ".join(rnd.choices(WORDS, k=rnd.randint(2, 6))),
+            "difficulty": rnd.choice(["easy", "normal", "hard"]),
+            "summary": " ".join(rnd.choices(WORDS, k=rnd.randint(5, 120))),
+        }
+        for _ in range(n)
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=settings.encode_batch_size)
+    parser.add_argument("--no-sort", action="store_true")
+    args = parser.parse_args()
+
+    settings.encode_batch_size = args.batch_size
+    settings.encode_sort_by_length = not args.no_sort
+
+    await encoder.initialize()
+    texts = [course_text(course) for course in make_courses(args.texts)]
+
+    # Warm up
+    encoder.reducer(encoder.model.encode(texts[0], show_progress_bar=False))
+
+    start = time.perf_counter()
+    for text in texts:
+        encoder.reducer(encoder.model.encode(text, show_progress_bar=False))
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await encoder.vectorize_batch(texts)
+    batched = time.perf_counter() - start
+
+    print(f"Texts: {len(texts)}, batch size: {args.batch_size}, sort by length: {not args.no_sort}")
+    print(f"Per-text vectorize:   {len(texts) / sequential:8.1f} texts/sec ({sequential:.2f}s)")
+    print(f"Batched vectorize:    {len(texts) / batched:8.1f} texts/sec ({batched:.2f}s)")
+    print(f"Speedup:              {sequential / batched:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
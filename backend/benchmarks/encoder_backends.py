@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Encoder backend benchmark
+
+Loads the embedding model with each backend (torch, ONNX Runtime, int8-quantized ONNX Runtime)
+and reports single-query latency, batch throughput and cosine similarity to the torch vectors.
+
+Usage:
+    python backend/benchmarks/encoder_backends.py [--backends torch,onnx,onnx-int8] [--threads 0]
+        [--queries 200] [--texts 256] [--batch-size 32] [--model cointegrated/LaBSE-en-ru]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import settings
+from app.services.encoder import load_model
+from app.services.qdrant import course_text
+from benchmarks.encode_throughput import WORDS, make_courses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--threads", type=int, default=settings.encoder_threads)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=settings.encode_batch_size)
+    parser.add_argument("--model", default=settings.embedding_model)
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    queries = [" ".join(rnd.choices(WORDS, k=rnd.randint(2, 6))) for _ in range(args.queries)]
+    texts = [course_text(course) for course in make_courses(args.texts)]
+
+    reference = None
+    print(f"Model: {args.model}, threads: {args.threads or 'default'}")
+    print(f"{'backend':>10} {'p50 ms':>8} {'p95 ms':>8} {'texts/sec':>10} {'min cos':>8}")
+    for backend in args.backends.split(","):
+        model = load_model(args.model, backend, args.threads)
+        model.encode(queries[:8], show_progress_bar=False)  # Warm up
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            model.encode(query, show_progress_bar=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        vectors = model.encode(texts, batch_size=args.batch_size, show_progress_bar=False)
+        throughput = len(texts) / (time.perf_counter() - start)
+
+        if reference is None:
+            reference = vectors
+        cosine = (reference * vectors).sum(axis=1) / np.linalg.norm(reference, axis=1) / np.linalg.norm(vectors, axis=1)
+        print(f"{backend:>10} {np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f} "
+              f"{throughput:>10.1f} {cosine.min():>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Course normalization microbenchmark
+
+Compares the old nested-loop author resolution (authors x courses) with
+`normalize_courses` on a synthetic page of Stepik payloads.
+
+Usage:
+    python backend/benchmarks/normalize_courses.py [--courses 10000] [--authors 3000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.utils.courses import course_from_stepik, normalize_courses
+
+
+def make_payloads(n_courses: int, n_authors: int):
+    rnd = random.Random(42)
+    courses_info = [
+        {
+            "id": course_id,
+            "cover": None,
+            "title": f"Course {course_id}",
+            "time_to_complete": rnd.randint(0, 100) * 3600,
+            "difficulty": "easy",
+            "price": None,
+            "currency_code": "RUB",
+            "learners_count": rnd.randint(0, 10000),
+            "authors": rnd.sample(range(n_authors), rnd.randint(1, 3)),
+            "review_summary": course_id,
+            "description": "",
+            "summary": "",
+            "target_audience": "",
+            "acquired_skills": [],
+            "acquired_assets": [],
+            "title_en": "",
+            "learning_format": "",
+        }
+        for course_id in range(n_courses)
+    ]
+    reviews = [{"id": course_id, "course": course_id, "average": rnd.uniform(3, 5)} for course_id in range(n_courses)]
+    authors = [{"id": author_id, "full_name": f"Author {author_id}"} for author_id in range(n_authors)]
+    return courses_info, reviews, authors
+
+
+def nested_loop(courses_info, reviews, authors):
+    """The previous implementation: first author only, resolved by scanning every course for every author."""
+    courses = {}
+    for course_info in courses_info:
+        courses[course_info["id"]] = course_from_stepik(course_info)
+        courses[course_info["id"]]["authors"] = course_info["authors"][0] if course_info["authors"] else ""
+    for review in reviews:
+        if review["course"] in courses:
+            courses[review["course"]]["rating"] = int(review["average"])
+    for author in authors:
+        for i in courses:
+            if courses[i]["authors"] == author["id"]:
+                courses[i]["authors"] = author["full_name"]
+    for i in courses:
+        if str(courses[i]["authors"]).isdigit():
+            courses[i]["authors"] = ""
+    return courses
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=10000)
+    parser.add_argument("--authors", type=int, default=3000)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.courses, args.authors)
+    old = measure(nested_loop, *payloads)
+    new = measure(normalize_courses, *payloads)
+
+    print(f"Courses: {args.courses}, authors: {args.authors}")
+    print(f"Nested loop:        {old * 1000:10.1f} ms")
+    print(f"normalize_courses:  {new * 1000:10.1f} ms")
+    print(f"Speedup:            {old / new:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
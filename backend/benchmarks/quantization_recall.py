@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Quantization / dimension reduction recall benchmark
+
+Encodes synthetic courses and queries with the full model, then for every combination of
+reduced dimension and quantization builds a temporary Qdrant collection and reports
+recall@k against exact full-precision search, mean search latency and the RAM taken by vectors.
+
+Quantization needs a Qdrant server; with --memory the in-process client is used and only
+the effect of dimension reduction is measured.
+
+Usage:
+    python backend/benchmarks/quantization_recall.py [--courses 2000] [--queries 100] [--k 10]
+        [--dims 0,384,256] [--quantization none,scalar,binary] [--reduction truncate|pca]
+        [--host localhost] [--port 6333] [--memory] [--save-pca models/pca.npz]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from qdrant_client import QdrantClient, models
+
+from app.config import settings
+from app.services.encoder import encoder
+from app.services.qdrant import course_text, quantization_config, search_params
+from app.utils.reduction import DimensionReducer
+from benchmarks.encode_throughput import WORDS, make_courses
+
+# RAM bytes per dimension of one vector
+BYTES_PER_DIM = {"none": 4, "scalar": 1, "binary": 1 / 8}
+
+
+def make_queries(n: int):
+    rnd = random.Random(7)
+    return [" ".join(rnd.choices(WORDS, k=rnd.randint(2, 5))) for _ in range(n)]
+
+
+def exact_top_k(courses: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    courses = courses / np.linalg.norm(courses, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ courses.T), axis=1)[:, :k]
+
+
+def run_case(client, courses: np.ndarray, queries: np.ndarray, baseline: np.ndarray, k: int, quantization: str):
+    settings.qdrant_quantization = "" if quantization == "none" else quantization
+    name = f"bench_{courses.shape[1]}_{quantization}"
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        name,
+        vectors_config=models.VectorParams(size=courses.shape[1], distance=models.Distance.COSINE,
+                                           on_disk=quantization != "none"),
+        quantization_config=quantization_config(),
+    )
+    client.upload_points(name, points=[
+        models.PointStruct(id=i, vector=vector.tolist()) for i, vector in enumerate(courses)
+    ], wait=True)
+
+    hits, elapsed = 0, 0.0
+    for query, expected in zip(queries, baseline):
+        start = time.perf_counter()
+        points = client.query_points(name, query=query.tolist(), limit=k, search_params=search_params()).points
+        elapsed += time.perf_counter() - start
+        hits += len({point.id for point in points} & set(expected.tolist()))
+    client.delete_collection(name)
+    return hits / (len(queries) * k), elapsed / len(queries) * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dims", default="0,384,256")
+    parser.add_argument("--quantization", default="none,scalar,binary")
+    parser.add_argument("--reduction", choices=["truncate", "pca"], default="truncate")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--memory", action="store_true")
+    parser.add_argument("--save-pca", default="", help="Save PCA components of the largest reduced dimension here")
+    args = parser.parse_args()
+
+    await encoder.initialize()
+    encoder.reducer = DimensionReducer(0)
+    courses = await encoder.vectorize_batch([course_text(course) for course in make_courses(args.courses)])
+    queries = np.array(await encoder.vectorize_many(make_queries(args.queries)))
+    baseline = exact_top_k(courses, queries, args.k)
+
+    client = QdrantClient(":memory:") if args.memory else QdrantClient(host=args.host, port=args.port)
+    quantizations = args.quantization.split(",")
+    if args.memory and quantizations != ["none"]:
+        print("In-process Qdrant ignores quantization, only dimension reduction is measured")
+        quantizations = ["none"]
+
+    dims = [int(dim) for dim in args.dims.split(",")]
+    print(f"Courses: {len(courses)}, queries: {len(queries)}, model dim: {courses.shape[1]}, "
+          f"reduction: {args.reduction}, oversampling: {settings.qdrant_quantization_oversampling}")
+    print(f"{'dim':>5} {'quantization':>12} {f'recall@{args.k}':>10} {'ms/query':>9} {'RAM MB':>8}")
+    for dim in dims:
+        reducer = DimensionReducer(dim, args.reduction, args.save_pca)
+        if reducer.enabled and args.reduction == "pca":
+            reducer.fit(courses)
+            if args.save_pca and dim == max(dims):
+                reducer.save()
+        reduced_courses, reduced_queries = reducer(courses), reducer(queries)
+        for quantization in quantizations:
+            recall, latency = run_case(client, reduced_courses, reduced_queries, baseline, args.k, quantization)
+            ram = len(courses) * reduced_courses.shape[1] * BYTES_PER_DIM[quantization] / 2 ** 20
+            print(f"{reduced_courses.shape[1]:>5} {quantization:>12} {recall:>10.3f} {latency:>9.2f} {ram:>8.2f}")
+
+    await encoder.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
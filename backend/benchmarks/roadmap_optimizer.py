@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Local roadmap optimizer benchmark
+
+Times `select_courses` (shortlist, MMR over course vectors and the two-budget knapsack)
+on synthetic candidates and reports the latency percentiles per call.
+
+Usage:
+    python backend/benchmarks/roadmap_optimizer.py [--candidates 100] [--runs 200] [--dim 768]
+        [--hours 60] [--cost 1500]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.utils.roadmap_optimizer import select_courses
+
+
+def make_candidates(n: int, dim: int, rnd: np.random.Generator):
+    courses = [
+        {
+            "id": i, "title": f"Course {i}", "difficulty": "normal", "pupils_num": int(rnd.integers(0, 10000)),
+            "rating": float(rnd.uniform(3, 5)), "duration": int(rnd.integers(1, 40)),
+            "price": int(rnd.integers(0, 3)) * 500, "currency_code": "RUB",
+        }
+        for i in range(n)
+    ]
+    vectors = {i: rnd.normal(size=dim) for i in range(n)}
+    return courses, rnd.random(n).tolist(), vectors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--hours", type=int, default=60)
+    parser.add_argument("--cost", type=int, default=1500)
+    args = parser.parse_args()
+
+    rnd = np.random.default_rng(0)
+    latencies = []
+    for _ in range(args.runs):
+        courses, similarities, vectors = make_candidates(args.candidates, args.dim, rnd)
+        start = time.perf_counter()
+        select_courses(courses, similarities, args.hours, args.cost, vectors=vectors)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"Candidates: {args.candidates}, runs: {args.runs}, vector dim: {args.dim}")
+    print(f"p50 {np.percentile(latencies, 50):.2f} ms, p95 {np.percentile(latencies, 95):.2f} ms, "
+          f"max {max(latencies):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import pytest
+import pytest_asyncio
+from httpx import MockTransport, Request, Response
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import roadmap, user  # noqa: F401 - registers the tables
+from app.services import database, stepik
+
+
+def make_course_payload(overrides: dict = None, **fields) -> dict:
+    """Генератор валидного словаря курса для мок-ответов: make_course_payload({"id": 2}) или make_course_payload(id=2)."""
+    data = {
+        "id": 1,
+        "cover_url": "https://example.com/image.jpg",
+        "title": "Test Course",
+        "duration": 4,
+        "difficulty": "medium",
+        "price": 0,
+        "currency_code": "RUB",
+        "pupils_num": 123,
+        "authors": "John Doe",
+        "rating": 5,
+        "url": "https://stepik.org/course/1/promo",
+        "description": "Learn test-driven development",
+        "summary": "Course for testing",
+        "target_audience": "Developers",
+        "acquired_skills": "testing, mocking",
+        "acquired_assets": "project templates",
+        "title_en": "Test Course",
+        "learning_format": "online"
+    }
+    if overrides:
+        data.update(overrides)
+    data.update(fields)
+    return data
+
+
+@pytest.fixture
+def course_payload():
+    """make_course_payload для тестов: course_payload(id=2, title="...")."""
+    return make_course_payload
+
+
+@pytest_asyncio.fixture
+async def engine():
+    """Пустая in-memory SQLite база со схемой приложения."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def sessions(engine):
+    """Фабрика сессий с теми же настройками, что и database.Session."""
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def stepik_api():
+    """
+    Мок-сервер Stepik API: `await stepik_api(responses)` запускает клиент Stepik, который отвечает
+    JSON-ом из `responses` по последнему сегменту пути запроса, и возвращает список запрошенных путей.
+    """
+    requested = []
+
+    async def start(responses: dict) -> list:
+        def handler(request: Request) -> Response:
+            requested.append(request.url.path)
+            return Response(200, json=responses[request.url.path.rsplit("/", 1)[-1]])
+
+        await stepik.start(transport=MockTransport(handler))
+        return requested
+
+    yield start
+    await stepik.close()
@@ -0,0 +1,112 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from fastapi import status
+
+from app.main import app
+from app.routers.users import get_current_user
+from app.services import database
+from app.services.write_behind import write_behind
+
+
+@pytest_asyncio.fixture
+async def client(sessions):
+    async def get_session():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[database.get_session] = get_session
+    app.dependency_overrides[get_current_user] = lambda: "1"
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_chat_lifecycle(client):
+    """
+    Создание чата, сохранение сообщений и получение списка чатов через асинхронную сессию.
+    """
+    response = await client.post("/api/chats")
+    assert response.status_code == status.HTTP_200_OK
+    chat_id = response.json()["id"]
+
+    for number, text in enumerate(["Привет", "Хочу изучить Python"]):
+        response = await client.put(f"/api/chats/{chat_id}", json={"message": text, "messageNumber": number})
+        assert response.status_code == status.HTTP_200_OK
+
+    response = await client.get("/api/chats")
+    assert response.status_code == status.HTTP_200_OK
+    chats = response.json()
+    assert [chat["id"] for chat in chats] == [chat_id]
+    assert [message["text"] for message in chats[0]["messages"]] == ["Привет", "Хочу изучить Python"]
+
+
+@pytest.mark.asyncio
+async def test_save_message_unknown_chat(client):
+    """
+    Сообщение в несуществующий чат возвращает 404.
+    """
+    response = await client.put("/api/chats/999", json={"message": "text", "messageNumber": 0})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_save_message_write_behind(client, sessions, monkeypatch):
+    """
+    В режиме write-behind сообщение сохраняется в фоне после ответа.
+    """
+    monkeypatch.setattr(write_behind, "session_factory", sessions)
+    write_behind.start()
+    try:
+        chat_id = (await client.post("/api/chats")).json()["id"]
+        response = await client.put(f"/api/chats/{chat_id}", json={"message": "Привет", "messageNumber": 0})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["message_id"] is None
+    finally:
+        await write_behind.stop()
+
+    chats = (await client.get("/api/chats")).json()
+    assert [message["text"] for message in chats[0]["messages"]] == ["Привет"]
+
+
+@pytest.mark.asyncio
+async def test_chat_pagination(client):
+    """
+    Список чатов и сообщения чата отдаются страницами по курсору.
+    """
+    chat_ids = [(await client.post("/api/chats")).json()["id"] for _ in range(5)]
+    for number in range(5):
+        await client.put(f"/api/chats/{chat_ids[0]}", json={"message": f"m{number}", "messageNumber": number})
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "before": cursor}
+        page = (await client.get("/api/chats/summaries", params=params)).json()
+        pages.append([chat["id"] for chat in page["items"]])
+        assert all("messages" not in chat for chat in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [chat_ids[:-3:-1], chat_ids[-3:-5:-1], chat_ids[:1]]
+
+    first = (await client.get(f"/api/chats/{chat_ids[0]}/messages", params={"limit": 3})).json()
+    rest = (await client.get(f"/api/chats/{chat_ids[0]}/messages",
+                             params={"limit": 3, "after": first["next_cursor"]})).json()
+    assert [message["text"] for message in first["items"]] == ["m0", "m1", "m2"]
+    assert [message["text"] for message in rest["items"]] == ["m3", "m4"]
+    assert rest["next_cursor"] is None
+
+    summaries = (await client.get("/api/chats/summaries")).json()["items"]
+    assert summaries[-1]["name"] == "m1"
+
+
+@pytest.mark.asyncio
+async def test_messages_of_foreign_chat(client):
+    """
+    Сообщения чужого чата недоступны.
+    """
+    chat_id = (await client.post("/api/chats")).json()["id"]
+    app.dependency_overrides[get_current_user] = lambda: "2"
+    response = await client.get(f"/api/chats/{chat_id}/messages")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
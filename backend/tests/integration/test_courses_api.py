@@ -1,23 +1,21 @@
+import json
+
 import pytest
-from httpx import AsyncClient, ASGITransport, Response
+from httpx import AsyncClient, ASGITransport
 from fastapi import status
-from unittest.mock import AsyncMock, patch
 
 from app.main import app
 from app.routers.users import get_current_user
+from app.services.popular import popular_courses
 
-@patch("httpx.AsyncClient")
 @pytest.mark.asyncio
-async def test_popular_courses_integration(mock_client_class):
+async def test_popular_courses_integration(stepik_api):
     """
     Интеграционный тест GET /api/courses/popular с подменой внешнего API Stepik.
     """
-    mock_client = AsyncMock()
-    mock_client_class.return_value.__aenter__.return_value = mock_client
-
-    mock_client.get.side_effect = [
-        Response(200, json={"course-recommendations": [{"courses": [202]}]}),
-        Response(200, json={"courses": [{
+    responses = {
+        "course-recommendations": {"course-recommendations": [{"courses": [202]}]},
+        "courses": {"courses": [{
             "id": 202,
             "cover": "https://example.com/image.jpg",
             "title": "Popular Integration Course",
@@ -35,10 +33,12 @@ async def test_popular_courses_integration(mock_client_class):
             "acquired_assets": ["assetA"],
             "title_en": "Popular Integration Course",
             "learning_format": "online"
-        }]}),
-        Response(200, json={"course-review-summaries": [{"course": 202, "average": 5}]}),
-        Response(200, json={"users": [{"id": 1, "full_name": "Author Name"}]})
-    ]
+        }]},
+        "course-review-summaries": {"course-review-summaries": [{"course": 202, "average": 5}]},
+        "users": {"users": [{"id": 1, "full_name": "Author Name"}]},
+    }
+    popular_courses.clear()
+    requested = await stepik_api(responses)
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -49,3 +49,43 @@ async def test_popular_courses_integration(mock_client_class):
     assert isinstance(data, list)
     assert data[0]["title"] == "Popular Integration Course"
     assert data[0]["authors"] == "Author Name"
+    assert len(requested) == 4
+
+
+@pytest.mark.asyncio
+async def test_stream_roadmap_events_order(monkeypatch, course_payload):
+    """
+    POST /api/courses/roadmaps/stream отдаёт события candidates, roadmap и saved по порядку.
+    """
+    from app.routers import courses as courses_router
+
+    async def search_candidates(payload):
+        courses = [course_payload({"id": i, "title": f"Course {i}"}) for i in range(12)]
+        return None, courses, [1.0 - i / 100 for i in range(12)]
+
+    async def choose_roadmap(payload, courses, scores, vector=None):
+        return courses[3:5]
+
+    async def hydrate(courses):
+        return courses
+
+    monkeypatch.setattr(courses_router, "search_candidates", search_candidates)
+    monkeypatch.setattr(courses_router, "choose_roadmap", choose_roadmap)
+    monkeypatch.setattr(courses_router.qdrant, "hydrate", hydrate)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/courses/roadmaps/stream", json={
+            "area": "ML", "current_level": "beginner", "desired_skills": "python", "hours": 10, "cost": 0,
+        })
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in response.text.strip().split("\n\n")
+    ]
+    assert [name for name, _ in events] == ["candidates", "roadmap", "saved"]
+    assert len(events[0][1]) == 10
+    assert [course["id"] for course in events[1][1]] == [3, 4]
+    assert events[2][1] == {"roadmap_id": None}
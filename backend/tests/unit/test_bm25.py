@@ -0,0 +1,22 @@
+from app.utils.bm25 import BM25Index, tokenize
+
+
+def test_tokenize_keeps_technology_names():
+    """Названия технологий вроде C++, C# и Node.js остаются одним токеном"""
+    assert tokenize("Курс по C++, C# и Node.js.") == ["курс", "по", "c++", "c#", "и", "node.js"]
+
+
+def test_rare_exact_term_ranks_first_and_index_is_incremental():
+    """Точное редкое слово ранжируется выше, документы можно заменять и удалять"""
+    index = BM25Index()
+    index.add(1, "Введение в анализ данных на Python")
+    index.add(2, "Pandas для анализа данных")
+    index.add(3, "Основы Python")
+
+    assert index.search("pandas python", limit=3)[0][0] == 2
+
+    index.add(2, "Kotlin для Android")
+    index.remove(3)
+    assert index.search("pandas", limit=3) == []
+    assert len(index) == 2
+    assert {doc_id for doc_id, _ in index.search("python kotlin", limit=3)} == {1, 2}
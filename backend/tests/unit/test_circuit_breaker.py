@@ -0,0 +1,42 @@
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = open_breaker()
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert breaker.rejected == 2
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_opens_again():
+    breaker = open_breaker()
+    breaker.reset_timeout = 60
+
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_released_trial_lets_next_caller_try():
+    breaker = open_breaker()
+
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
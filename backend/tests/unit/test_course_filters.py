@@ -0,0 +1,24 @@
+from qdrant_client import QdrantClient, models
+
+from app.utils.course_filters import course_filter, course_fits
+
+COURSES = [
+    {"id": 1, "price": 0, "currency_code": "USD", "duration": 5},
+    {"id": 2, "price": 500, "currency_code": "RUB", "duration": 5},
+    {"id": 3, "price": 5000, "currency_code": "RUB", "duration": 5},
+    {"id": 4, "price": 10, "currency_code": "USD", "duration": 5},
+    {"id": 5, "price": 0, "currency_code": "RUB", "duration": 50},
+]
+
+
+def test_qdrant_filter_matches_python_predicate():
+    client = QdrantClient(":memory:")
+    client.create_collection("courses", vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    client.upload_points("courses", points=[
+        models.PointStruct(id=course["id"], vector=[1, course["id"]], payload=course) for course in COURSES
+    ])
+
+    result = client.query_points("courses", query=[1, 1], query_filter=course_filter(10, 1000), limit=10)
+
+    assert sorted(point.id for point in result.points) == [1, 2]
+    assert [course["id"] for course in COURSES if course_fits(course, 10, 1000)] == [1, 2]
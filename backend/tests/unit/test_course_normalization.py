@@ -0,0 +1,39 @@
+from app.utils.courses import normalize_courses
+
+
+def make_course_info(course_id: int, authors: list) -> dict:
+    return {
+        "id": course_id,
+        "cover": None,
+        "title": f"Course {course_id}",
+        "time_to_complete": 7200,
+        "difficulty": "easy",
+        "price": None,
+        "currency_code": "RUB",
+        "learners_count": 10,
+        "authors": authors,
+        "review_summary": course_id,
+        "description": "",
+        "summary": "",
+        "target_audience": "",
+        "acquired_skills": ["a", "b"],
+        "acquired_assets": [],
+        "title_en": "",
+        "learning_format": "",
+    }
+
+
+def test_normalize_courses_resolves_all_authors_and_ratings():
+    courses = normalize_courses(
+        [make_course_info(1, [10, 11]), make_course_info(2, [12])],
+        [{"course": 1, "average": 4.6}],
+        [{"id": 10, "full_name": "First Author"}, {"id": 11, "full_name": "Second Author"}],
+    )
+
+    assert courses[1]["authors"] == "First Author, Second Author"
+    assert courses[1]["rating"] == 4
+    assert courses[1]["duration"] == 2
+    assert courses[1]["price"] == 0
+    assert courses[1]["acquired_skills"] == "ab"
+    assert courses[2]["authors"] == ""
+    assert courses[2]["rating"] == 5
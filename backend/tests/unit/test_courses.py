@@ -1,56 +1,25 @@
 import pytest
-from httpx import AsyncClient, ASGITransport, Response
+from httpx import AsyncClient, ASGITransport
 from fastapi import status, HTTPException
-from unittest.mock import AsyncMock, patch
 
 from starlette.status import HTTP_404_NOT_FOUND
 from starlette.testclient import TestClient
 
 from app.main import app
+from app.services.popular import popular_courses
 
 
-def make_course_payload(overrides: dict = None) -> dict:
-    """Генератор валидного словаря курса для мок-ответов."""
-    data = {
-        "id": 1,
-        "cover_url": "https://example.com/image.jpg",
-        "title": "Test Course",
-        "duration": 4,
-        "difficulty": "medium",
-        "price": 0,
-        "currency_code": "USD",
-        "pupils_num": 123,
-        "authors": "John Doe",
-        "rating": 5,
-        "url": "https://stepik.org/course/1/promo",
-        "description": "Learn test-driven development",
-        "summary": "Course for testing",
-        "target_audience": "Developers",
-        "acquired_skills": "testing, mocking",
-        "acquired_assets": "project templates",
-        "title_en": "Test Course",
-        "learning_format": "online"
-    }
-    if overrides:
-        data.update(overrides)
-    return data
-
-
-@patch("httpx.AsyncClient")
 @pytest.mark.asyncio
-async def test_get_popular_courses_success(mock_client_class):
+async def test_get_popular_courses_success(stepik_api):
     """Тест успешного получения популярных курсов через Stepik API."""
 
-    # Создаём мок экземпляра клиента
-    mock_client = AsyncMock()
-    mock_client_class.return_value.__aenter__.return_value = mock_client
-
-    # Настраиваем, что будет возвращать mock_client.get(...) при каждом вызове
-    mock_client.get.side_effect = [
-        Response(200, json={
+    popular_courses.clear()
+    # Настраиваем, что будет возвращать мок-сервер Stepik на каждый запрос
+    await stepik_api({
+        "course-recommendations": {
             "course-recommendations": [{"courses": [101]}]
-        }),
-        Response(200, json={
+        },
+        "courses": {
             "courses": [{
                 "id": 101,
                 "cover": "https://example.com/image.jpg",
@@ -70,14 +39,14 @@ async def test_get_popular_courses_success(mock_client_class):
                 "title_en": "Popular Course EN",
                 "learning_format": "online"
             }]
-        }),
-        Response(200, json={
+        },
+        "course-review-summaries": {
             "course-review-summaries": [{"course": 101, "average": 5}]
-        }),
-        Response(200, json={
+        },
+        "users": {
             "users": [{"id": 1, "full_name": "Stepik Author"}]
-        })
-    ]
+        },
+    })
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from httpx import MockTransport, Request, Response
+
+from app.config import settings
+from app.services.deepseek import DeepseekService
+
+
+def completion(content: str) -> Response:
+    return Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+@pytest_asyncio.fixture
+async def service(monkeypatch):
+    monkeypatch.setattr(settings, "deepseek_hedge_delay", 0.05)
+    service = DeepseekService()
+    service.api_key = "key"
+    yield service
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_and_first_valid_answer_wins(service, course_payload):
+    calls = []
+
+    async def handler(request: Request) -> Response:
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+            return completion("[0]")
+        return completion("[2, 1]")
+
+    await service.start(transport=MockTransport(handler))
+    courses = [course_payload(id=i) for i in range(3)]
+
+    chosen = await asyncio.wait_for(service.choose_courses("AI", "beginner", "python", 10, 0, courses), 1)
+
+    assert [course["id"] for course in chosen] == [2, 1]
+    assert service.hedges == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_after_consecutive_failures(service, monkeypatch, course_payload):
+    monkeypatch.setattr(service.breaker, "failure_threshold", 2)
+    calls = []
+
+    def handler(request: Request) -> Response:
+        calls.append(request)
+        return Response(503)
+
+    await service.start(transport=MockTransport(handler))
+    courses = [course_payload(id=i) for i in range(3)]
+
+    assert await service.choose_courses("AI", "beginner", "python", 10, 0, courses) is None
+    assert service.breaker.state == "open"
+    calls.clear()
+    assert await service.choose_courses("AI", "beginner", "python", 10, 0, courses) is None
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_streamed_answer_is_assembled_and_time_to_first_token_recorded(service, course_payload):
+    def handler(request: Request) -> Response:
+        assert json.loads(request.content)["stream"] is True
+        events = [{"choices": [{"delta": {"content": part}}]} for part in ("[1", ", 0]")]
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    await service.start(transport=MockTransport(handler))
+    courses = [course_payload(id=i) for i in range(3)]
+
+    chosen = await service.choose_courses("AI", "beginner", "python", 10, 0, courses)
+
+    assert [course["id"] for course in chosen] == [1, 0]
+    stats = service.stats()
+    assert stats["ttft_p50_seconds"] is not None
+    assert stats["max_prompt_tokens"] > 0
+
+
+@pytest.mark.asyncio
+async def test_half_open_breaker_sends_one_trial_request(service, monkeypatch, course_payload):
+    monkeypatch.setattr(service.breaker, "failure_threshold", 1)
+    monkeypatch.setattr(service.breaker, "reset_timeout", 0)
+    monkeypatch.setattr(settings, "deepseek_hedge_delay", 5)
+    calls = []
+
+    async def handler(request: Request) -> Response:
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        return completion("[0]")
+
+    await service.start(transport=MockTransport(handler))
+    courses = [course_payload(id=i) for i in range(3)]
+    service.breaker.record_failure()
+    assert service.breaker.state == "open"
+
+    results = await asyncio.gather(*(
+        service.choose_courses("AI", "beginner", "python", 10, 0, courses) for _ in range(5)
+    ))
+
+    assert len(calls) == 1
+    assert sum(result is not None for result in results) == 1
+    assert service.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("answer", ["[]", "[7, -1]"])
+async def test_answer_without_valid_indexes_gives_none(service, monkeypatch, answer, course_payload):
+    monkeypatch.setattr(settings, "deepseek_max_attempts", 1)
+
+    def handler(request: Request) -> Response:
+        return completion(answer)
+
+    await service.start(transport=MockTransport(handler))
+    courses = [course_payload(id=i) for i in range(3)]
+
+    assert await service.choose_courses("AI", "beginner", "python", 10, 0, courses) is None
+
+
+@pytest.mark.asyncio
+async def test_complete_uses_pooled_client_and_breaker(service, monkeypatch):
+    monkeypatch.setattr(service.breaker, "failure_threshold", 1)
+    bodies = []
+
+    def handler(request: Request) -> Response:
+        bodies.append(json.loads(request.content))
+        return completion('{"skills": []}') if len(bodies) == 1 else Response(503)
+
+    await service.start(transport=MockTransport(handler))
+
+    assert await service.complete("goal", json_mode=True) == '{"skills": []}'
+    assert bodies[0]["response_format"] == {"type": "json_object"}
+    with pytest.raises(Exception):
+        await service.complete("goal")
+    assert service.breaker.state == "open"
+    with pytest.raises(RuntimeError):
+        await service.complete("goal")
+    assert len(bodies) == 2
@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+from app.utils.ttl_cache import LRUTTLCache
+
+
+def test_lru_ttl_cache_evicts_least_recently_used_and_expired(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("app.utils.ttl_cache.time.monotonic", lambda: now[0])
+    cache = LRUTTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    now[0] = 11
+    assert cache.get("c") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_embedding_cache_normalizes_text_and_survives_restart(tmp_path):
+    vector = np.arange(4, dtype=np.float32)
+    cache = EmbeddingCache(maxsize=10, ttl=60, directory=str(tmp_path), disk_size=8)
+    cache.set("Python  beginner Data analysis ", "model", vector)
+    cache.flush()
+
+    restarted = EmbeddingCache(maxsize=10, ttl=60, directory=str(tmp_path), disk_size=8)
+    restarted.load(4, "model")
+
+    assert np.array_equal(restarted.get("python beginner data analysis", "model"), vector)
+    assert restarted.get("python beginner data analysis", "other-model") is None
+    assert restarted.stats()["disk_hits"] == 1
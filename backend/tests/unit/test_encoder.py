@@ -0,0 +1,52 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.embedding_cache import embedding_cache
+from app.services.encoder import EncoderService
+
+
+class FakeModel:
+    """Модель-заглушка: вектор текста — его длина, запоминает размеры батчей."""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by_length", [True, False])
+async def test_vectorize_batch_keeps_input_order(monkeypatch, sort_by_length):
+    monkeypatch.setattr(settings, "encode_batch_size", 2)
+    monkeypatch.setattr(settings, "encode_sort_by_length", sort_by_length)
+    service = EncoderService()
+    service.model = FakeModel()
+    texts = ["ccc", "a", "eeeee", "bb", "dddd"]
+
+    vectors = await service.vectorize_batch(texts)
+
+    assert vectors[:, 0].tolist() == [3, 1, 5, 2, 4]
+    assert service.model.batches == ([2, 2, 1] if sort_by_length else [5])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_vectorize_calls_share_one_encode(monkeypatch):
+    monkeypatch.setattr(settings, "encode_micro_batching", True)
+    embedding_cache.memory.clear()
+    service = EncoderService()
+    service.model = FakeModel()
+    service.batcher.window = 0.05
+
+    vectors = await asyncio.gather(*(service.vectorize("x" * n) for n in range(1, 6)))
+    await service.close()
+
+    assert [vector[0] for vector in vectors] == [1, 2, 3, 4, 5]
+    assert service.model.batches == [5]
@@ -0,0 +1,50 @@
+import inspect
+
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum.onnxruntime")
+
+from sentence_transformers import SentenceTransformer, models
+from transformers import BertConfig, BertModel, BertTokenizerFast
+
+from app.services.encoder import load_model, load_onnx_model
+
+SENTENCES = ["python анализ данных", "курс по машинному обучению", "основы sql"]
+
+# optimum exports with the TorchScript exporter; torch >= 2.9 switched torch.onnx.export to dynamo by default
+dynamo_export = getattr(inspect.signature(torch.onnx.export).parameters.get("dynamo"), "default", False) is True
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """Маленькая случайная BERT-модель, чтобы тест не скачивал LaBSE"""
+    path = tmp_path_factory.mktemp("tiny")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(set("".join(SENTENCES).replace(" ", "")))
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    BertModel(BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                         intermediate_size=64)).save_pretrained(path / "bert")
+    BertTokenizerFast(vocab_file=str(path / "vocab.txt")).save_pretrained(path / "bert")
+    transformer = models.Transformer(str(path / "bert"))
+    SentenceTransformer(modules=[transformer, models.Pooling(transformer.get_word_embedding_dimension())]).save(
+        str(path / "model"))
+    return str(path / "model")
+
+
+@pytest.mark.skipif(dynamo_export, reason=f"optimum can't export with torch {torch.__version__} (dynamo exporter)")
+@pytest.mark.parametrize("quantized", [False, True])
+def test_onnx_backend_matches_torch(model_path, tmp_path, quantized):
+    """ONNX и int8-ONNX бэкенды дают векторы с косинусом ≥ 0.99 к выходу torch"""
+    expected = load_model(model_path, "torch").encode(SENTENCES)
+    model = load_onnx_model(model_path, quantized=quantized, threads=1, directory=str(tmp_path))
+    actual = model.encode(SENTENCES)
+
+    cosine = (expected * actual).sum(axis=1) / np.linalg.norm(expected, axis=1) / np.linalg.norm(actual, axis=1)
+    assert cosine.min() >= 0.99
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_model("any", "tensorrt")
@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.executor import InstrumentedExecutor, pools, run_in_pool
+
+
+@pytest.mark.asyncio
+async def test_run_in_pool_uses_named_pool(monkeypatch):
+    pool = InstrumentedExecutor("test", 1)
+    monkeypatch.setitem(pools, "test", pool)
+
+    thread_name = await run_in_pool("test", lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("test-pool")
+    stats = pool.stats()
+    assert stats["completed"] == 1
+    assert stats["queued"] == 0
+    assert stats["running"] == 0
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_job_leaves_queue(monkeypatch):
+    pool = InstrumentedExecutor("test", 1)
+    monkeypatch.setitem(pools, "test", pool)
+    release = threading.Event()
+
+    running = asyncio.create_task(run_in_pool("test", release.wait))
+    queued = asyncio.create_task(run_in_pool("test", lambda: None))
+    await asyncio.sleep(0.05)
+    assert pool.stats()["queued"] == 1
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    release.set()
+    await running
+
+    stats = pool.stats()
+    assert stats["queued"] == 0
+    assert stats["cancelled"] == 1
+    assert stats["completed"] == 1
+    pool.shutdown()
@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+from app.utils.fusion import reciprocal_rank_fusion, split_skills
+
+
+def point(point_id: int, score: float):
+    return SimpleNamespace(id=point_id, score=score)
+
+
+def test_split_skills():
+    """Навыки делятся по запятым, точкам с запятой и союзам, дубликаты убираются"""
+    assert split_skills("Python, SQL и pandas; python") == ["Python", "SQL", "pandas"]
+    assert split_skills("") == []
+
+
+def test_rrf_dedupes_and_prefers_courses_found_by_several_queries():
+    """Курс из нескольких подзапросов поднимается выше, а его score — лучшая близость"""
+    fused = reciprocal_rank_fusion([
+        [point(1, 0.9), point(2, 0.8), point(3, 0.7)],
+        [point(4, 0.95), point(3, 0.85)],
+    ])
+
+    assert [p.id for p in fused] == [3, 1, 4, 2]
+    assert fused[0].score == 0.85
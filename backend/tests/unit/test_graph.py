@@ -0,0 +1,48 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app import graph
+
+
+@pytest.mark.asyncio
+async def test_build_roadmap_uses_one_llm_call_and_one_encode(monkeypatch, course_payload):
+    """Один вызов LLM, один батч эмбеддингов и по поиску на каждый поднавык"""
+    llm_calls, encoded, searched = [], [], []
+
+    async def call_deepseek(prompt, system_prompt=None, json_mode=False):
+        llm_calls.append(prompt)
+        return json.dumps({"skills": [
+            {"skill": "Python", "subskills": ["syntax", "OOP"]},
+            {"skill": "SQL", "subskills": []},
+        ]})
+
+    async def vectorize_many(texts):
+        encoded.append(list(texts))
+        return [[float(i)] for i in range(len(texts))]
+
+    async def search(vector, collection_name, limit=10, query_filter=None, with_payload=True):
+        searched.append(vector)
+        ids = {0.0: [1, 2], 1.0: [2, 3], 2.0: [4]}[vector[0]]
+        return [SimpleNamespace(id=i, payload=course_payload(id=i, duration=1), score=1 - i / 10 + vector[0] / 100) for i in ids]
+
+    async def vectors(ids):
+        return {}
+
+    async def hydrate(courses):
+        return courses
+
+    monkeypatch.setattr(graph, "call_deepseek", call_deepseek)
+    monkeypatch.setattr(graph.encoder, "vectorize_many", vectorize_many)
+    monkeypatch.setattr(graph.qdrant, "search", search)
+    monkeypatch.setattr(graph.qdrant, "vectors", vectors)
+    monkeypatch.setattr(graph.qdrant, "hydrate", hydrate)
+
+    roadmap = await graph.build_roadmap("learn backend", hours=10, cost=0)
+
+    assert len(llm_calls) == 1
+    assert encoded == [["Python syntax", "Python OOP", "SQL"]]
+    assert len(searched) == 3
+    assert sorted(course["id"] for course in roadmap["courses"]) == [1, 2, 3, 4]
+    assert roadmap["skills"][1] == {"skill": "SQL", "subskills": []}
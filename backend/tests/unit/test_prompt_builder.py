@@ -0,0 +1,33 @@
+from app.utils.prompt_builder import estimate_tokens, roadmap_prompt, truncate
+
+
+def test_truncate_cuts_at_word_boundary():
+    """Длинный текст обрезается по границе слова до бюджета токенов"""
+    text = truncate("один два три четыре пять шесть", 4)
+
+    assert text == "один два…"
+    assert truncate("коротко", 10) == "коротко"
+
+
+def test_prompt_fits_token_budget_and_keeps_ranking_order(course_payload):
+    """В промпт попадают первые по рангу курсы, пока он укладывается в бюджет"""
+    courses = [course_payload(id=i, title=f"Курс {i}", summary="очень подробное описание курса " * 50)
+               for i in range(100)]
+
+    prompt, included = roadmap_prompt("ML", "beginner", "python", 40, 0, courses,
+                                      max_tokens=1500, summary_tokens=40, max_candidates=30)
+
+    assert estimate_tokens(prompt) <= 1500
+    assert 0 < len(included) < 30
+    assert [course["id"] for course in included] == list(range(len(included)))
+    assert f"{len(included) - 1}. Курс {len(included) - 1}" in prompt
+
+
+def test_prompt_caps_candidates(course_payload):
+    """Число курсов в промпте ограничено max_candidates"""
+    courses = [course_payload(id=i) for i in range(10)]
+
+    _, included = roadmap_prompt("ML", "beginner", "python", 40, 0, courses,
+                                 max_tokens=100000, summary_tokens=10, max_candidates=3)
+
+    assert len(included) == 3
@@ -0,0 +1,69 @@
+import pytest
+from qdrant_client import QdrantClient, models
+
+from app.services.encoder import encoder
+from app.services.qdrant import QdrantService, SEARCH_PAYLOAD_FIELDS
+
+
+@pytest.fixture
+def service():
+    service = QdrantService()
+    service.client = QdrantClient(":memory:")
+    service.client.create_collection(
+        "courses", vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE)
+    )
+    service.client.upload_points("courses", points=[
+        models.PointStruct(id=i, vector=[1, i], payload={
+            "id": i, "title": f"Course {i}", "summary": "", "difficulty": "easy", "pupils_num": 1,
+            "duration": 1, "price": 0, "currency_code": "RUB", "description": "Long description",
+        })
+        for i in range(1, 4)
+    ])
+    return service
+
+
+@pytest.mark.asyncio
+async def test_search_returns_projected_payload_and_hydrate_restores_it(service):
+    points = await service.search([1, 3], "courses", limit=2, with_payload=SEARCH_PAYLOAD_FIELDS)
+
+    assert all("description" not in point.payload for point in points)
+    assert all(point.vector is None for point in points)
+
+    chosen = [points[1].payload, points[0].payload]
+    hydrated = await service.hydrate(chosen)
+    assert [course["id"] for course in hydrated] == [course["id"] for course in chosen]
+    assert all(course["description"] == "Long description" for course in hydrated)
+
+
+@pytest.mark.asyncio
+async def test_search_batch_returns_results_per_query(service):
+    results = await service.search_batch([[1, 0], [0, 1]], "courses", limit=2, with_payload=SEARCH_PAYLOAD_FIELDS)
+
+    assert len(results) == 2
+    assert results[0][0].id == 1
+    assert results[1][0].id == 3
+    assert all("description" not in point.payload for points in results for point in points)
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_adds_filtered_lexical_hits(service):
+    service.lexical.add(3, "Kotlin for Android")
+    service.lexical.add(2, "Kotlin basics")
+    query_filter = models.Filter(must=[models.FieldCondition(key="id", range=models.Range(lte=2))])
+
+    points = await service.hybrid_search("kotlin", [[1, 0]], "courses", limit=1, query_filter=query_filter,
+                                         with_payload=SEARCH_PAYLOAD_FIELDS)
+    fused = await service.hybrid_search("kotlin", [[1, 0]], "courses", limit=3, query_filter=query_filter,
+                                        with_payload=SEARCH_PAYLOAD_FIELDS)
+
+    assert len(points) == 1
+    assert {point.id for point in fused} == {1, 2}
+    assert all(0 < point.score <= 1 for point in fused)
+
+
+def test_collection_with_another_vector_size_is_dropped(service, monkeypatch):
+    monkeypatch.setattr(encoder, "dimension", lambda: 3)
+
+    service._update_collection()
+
+    assert not service.client.collection_exists("courses")
@@ -0,0 +1,32 @@
+from app.config import settings
+from app.services.qdrant import content_hash, payload_hash, plan_sync
+
+
+def test_plan_sync_encodes_only_new_or_changed_courses(course_payload):
+    unchanged = course_payload(id=1)
+    price_changed = course_payload(id=2)
+    summary_changed = course_payload(id=3)
+    existing = {
+        1: (content_hash(unchanged), payload_hash(unchanged)),
+        2: (content_hash(price_changed), payload_hash(price_changed)),
+        3: (content_hash(summary_changed), payload_hash(summary_changed)),
+    }
+
+    to_encode, to_update = plan_sync(existing, [
+        course_payload(id=1),
+        course_payload(id=2, price=990),
+        course_payload(id=3, summary="New summary"),
+        course_payload(id=4),
+    ])
+
+    assert [course["id"] for course in to_encode] == [3, 4]
+    assert [course["id"] for course in to_update] == [2]
+    assert to_update[0]["payload_hash"] == payload_hash(course_payload(id=2, price=990))
+
+
+def test_content_hash_depends_on_vector_model(monkeypatch, course_payload):
+    """Смена модели эмбеддингов меняет хеш содержимого, и курс перекодируется"""
+    course = course_payload(id=1)
+    before = content_hash(course)
+    monkeypatch.setattr(settings, "embedding_model", "another/model")
+    assert content_hash(course) != before
@@ -0,0 +1,40 @@
+import numpy as np
+
+from app.config import settings
+from app.services.qdrant import content_hash
+from app.utils.reduction import DimensionReducer, vector_model
+
+
+def test_truncate_keeps_first_dimensions_and_normalizes():
+    """Усечение оставляет первые измерения и нормирует вектор, форма входа сохраняется"""
+    reducer = DimensionReducer(2)
+
+    assert np.allclose(reducer(np.array([3.0, 4.0, 100.0])), [0.6, 0.8])
+    assert reducer(np.ones((5, 4))).shape == (5, 2)
+    assert reducer.output_dim(768) == 2
+    assert DimensionReducer(0).output_dim(768) == 768
+
+
+def test_pca_round_trip(tmp_path):
+    """PCA-компоненты сохраняются и загружаются, проекция сохраняет главное направление"""
+    rnd = np.random.default_rng(0)
+    vectors = rnd.normal(size=(200, 8)) * np.array([10, 5, 1, 1, 1, 1, 1, 1])
+    reducer = DimensionReducer(2, "pca", str(tmp_path / "pca.npz"))
+    reducer.fit(vectors)
+    reducer.save()
+
+    loaded = DimensionReducer(2, "pca", str(tmp_path / "pca.npz"))
+    loaded.load()
+    assert np.allclose(loaded(vectors[:3]), reducer(vectors[:3]), atol=1e-5)
+    assert abs(loaded.components[0][0]) > 0.9
+
+
+def test_reduction_changes_vector_model_and_content_hash(monkeypatch):
+    """Смена размерности меняет ключ кэша и хеш контента, чтобы курсы перекодировались"""
+    course = {"title": "Python", "title_en": "Python", "difficulty": "easy", "summary": ""}
+    full_model, full_hash = vector_model(), content_hash(course)
+
+    monkeypatch.setattr(settings, "embedding_dim", 256)
+
+    assert vector_model() != full_model
+    assert content_hash(course) != full_hash
@@ -0,0 +1,62 @@
+import numpy as np
+
+from app.utils import roadmap_optimizer
+from app.utils.roadmap_optimizer import POOL_SIZE, SHORTLIST_SIZE, select_courses, shortlist
+
+
+def test_select_courses_respects_budgets_and_orders_by_difficulty(course_payload):
+    courses = [
+        course_payload(id=1, difficulty="hard", duration=20),
+        course_payload(id=2, difficulty="easy", duration=10, price=3000),
+        course_payload(id=3, difficulty="easy", duration=10, price=900),
+        course_payload(id=4, duration=10, price=50, currency_code="USD"),
+        course_payload(id=5, duration=15),
+        course_payload(id=6, difficulty="normal", duration=5),
+    ]
+    similarities = [0.9, 0.9, 0.8, 0.9, 0.7, 0.6]
+
+    chosen = select_courses(courses, similarities, hours=40, cost=1000)
+
+    assert sum(course["duration"] for course in chosen) <= 40
+    assert sum(course["price"] for course in chosen) <= 1000
+    assert [course["id"] for course in chosen] == [3, 6, 1]
+
+
+def test_select_courses_prefers_diverse_courses(course_payload):
+    courses = [course_payload(id=i, duration=1) for i in range(1, 4)]
+    vectors = {1: np.array([1.0, 0.0]), 2: np.array([1.0, 0.0]), 3: np.array([0.0, 1.0])}
+
+    chosen = select_courses(courses, [0.9, 0.89, 0.7], hours=2, cost=0, vectors=vectors, k=2)
+
+    assert sorted(course["id"] for course in chosen) == [1, 3]
+
+
+def test_select_courses_bounds_work_on_100_candidates(monkeypatch, course_payload):
+    rnd = np.random.default_rng(0)
+    courses = [course_payload(id=i, duration=int(rnd.integers(1, 40)), price=int(rnd.integers(0, 3)) * 500)
+               for i in range(100)]
+    similarities = rnd.random(100).tolist()
+    vectors = {i: rnd.normal(size=768) for i in range(100)}
+    calls = {}
+    original_mmr, original_knapsack = roadmap_optimizer.mmr, roadmap_optimizer.knapsack
+
+    def mmr(relevance, matrix, size):
+        calls["mmr"] = (len(relevance), matrix.shape[0], size)
+        return original_mmr(relevance, matrix, size)
+
+    def knapsack(items, durations, prices, hours, cost, k):
+        calls["knapsack"] = (len(items), len(durations), k)
+        return original_knapsack(items, durations, prices, hours, cost, k)
+
+    monkeypatch.setattr(roadmap_optimizer, "mmr", mmr)
+    monkeypatch.setattr(roadmap_optimizer, "knapsack", knapsack)
+    chosen = select_courses(courses, similarities, hours=60, cost=1500, vectors=vectors)
+
+    assert 0 < len(chosen) <= 5
+    assert sum(course["duration"] for course in chosen) <= 60
+    assert sum(course["price"] for course in chosen) <= 1500
+    shortlisted = {course["id"] for course, _ in shortlist(courses, similarities, hours=60, cost=1500)}
+    assert {course["id"] for course in chosen} <= shortlisted
+    # MMR sees only the shortlist and the knapsack only the MMR pool, whatever the number of candidates
+    assert calls["mmr"] == (SHORTLIST_SIZE, SHORTLIST_SIZE, POOL_SIZE)
+    assert calls["knapsack"] == (POOL_SIZE, SHORTLIST_SIZE, 5)
@@ -0,0 +1,118 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.models.roadmap import Course, Dialog, Message, Roadmap, RoadmapStatus
+from app.services import database
+from app.services.roadmap_service import save_roadmap, user_roadmaps
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def dialog(sessions, course_payload):
+    async with sessions() as session:
+        session.add(Dialog(id=1, name="My way", owner=1))
+        session.add_all([
+            Message(text="Привет", is_user=False, dialog_id=1),
+            Message(text="Хочу изучить Python", is_user=True, dialog_id=1),
+        ])
+        session.add(Course(**course_payload({"id": 1, "title": "Old title", "rating": 4.0})))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_save_roadmap_upserts_courses(sessions, course_payload):
+    """
+    Дорожная карта сохраняется в порядке выбора курсов, существующий курс обновляется, новые добавляются.
+    """
+    async with sessions() as session:
+        roadmap_id = await save_roadmap(session, 1, [course_payload({"id": i}) for i in (3, 1, 2)])
+
+    async with sessions() as session:
+        roadmap = (await session.execute(
+            select(Roadmap).options(selectinload(Roadmap.courses)).filter(Roadmap.id == roadmap_id)
+        )).scalar_one()
+        dialog = await session.get(Dialog, 1)
+    assert roadmap.name == "Хочу изучить Python"
+    assert [(course.id, course.title) for course in roadmap.courses] == [
+        (3, "Test Course"), (1, "Test Course"), (2, "Test Course"),
+    ]
+    assert dialog.roadmap_id == roadmap_id
+
+
+@pytest.mark.asyncio
+async def test_save_roadmap_statement_count(engine, sessions, course_payload):
+    """
+    Число запросов к БД не зависит от количества курсов.
+    """
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    counts = []
+    for courses in ([course_payload({"id": 1})], [course_payload({"id": i}) for i in range(10, 40)]):
+        statements.clear()
+        async with sessions() as session:
+            await save_roadmap(session, 1, courses)
+        counts.append(len(statements))
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.asyncio
+async def test_save_roadmap_unknown_dialog(sessions, course_payload):
+    """
+    Для несуществующего диалога дорожная карта не сохраняется.
+    """
+    async with sessions() as session:
+        assert await save_roadmap(session, 999, [course_payload({"id": 1})]) is None
+
+
+@pytest.mark.asyncio
+async def test_user_roadmaps_query_count(engine, sessions, course_payload):
+    """
+    Дорожные карты пользователя выбираются через Dialog.roadmap_id за два запроса при любом их количестве.
+    """
+    async with sessions() as session:
+        # Roadmap ids don't match dialog ids: the roadmap of dialog 1 is not roadmap 1
+        session.add(Roadmap(id=1, status=RoadmapStatus.notNow, name="Чужая"))
+        session.add(Dialog(id=2, name="Чужой", owner=2, roadmap_id=1))
+        for dialog_id in range(10, 15):
+            session.add(Dialog(id=dialog_id, name="My way", owner=1))
+        await session.commit()
+        for dialog_id in range(10, 15):
+            courses = [course_payload({"id": dialog_id + 100}), course_payload({"id": dialog_id})]
+            await save_roadmap(session, dialog_id, courses)
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    async with sessions() as session:
+        roadmaps = await user_roadmaps(session, 1)
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    assert len(statements) == 2
+    assert len(roadmaps) == 5 and 1 not in {roadmap.id for roadmap in roadmaps}
+    assert [[course.id for course in roadmap.courses] for roadmap in roadmaps] == [
+        [dialog_id + 100, dialog_id] for dialog_id in range(10, 15)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_create_schema_adds_position_to_existing_links():
+    """
+    create_schema добавляет колонку position в таблицу связей, созданную до её появления.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("CREATE TABLE roadmap_courses (roadmap_id INTEGER, course_id INTEGER)")
+        await conn.run_sync(database.create_schema)
+        columns = await conn.run_sync(lambda sync: [c["name"] for c in inspect(sync).get_columns("roadmap_courses")])
+    await engine.dispose()
+    assert columns == ["roadmap_id", "course_id", "position"]
@@ -0,0 +1,24 @@
+import pytest
+
+from app.schemas.course import CourseSearchRequest
+from app.utils import search
+
+
+@pytest.mark.asyncio
+async def test_empty_llm_roadmap_falls_back_to_local_optimizer(monkeypatch, course_payload):
+    """Пустой ответ deepseek не даёт пустую дорожную карту: выбирает локальный оптимизатор"""
+    courses = [course_payload({"id": i}) for i in range(8)]
+
+    async def choose_with_llm(payload, courses, scores, vector=None):
+        return []
+
+    async def choose_locally(payload, courses, scores):
+        return courses[:2]
+
+    monkeypatch.setattr(search, "choose_with_llm", choose_with_llm)
+    monkeypatch.setattr(search, "choose_locally", choose_locally)
+    payload = CourseSearchRequest(area="AI", current_level="beginner", desired_skills="python", hours=10, cost=0)
+
+    chosen = await search.choose_roadmap(payload, courses, [1.0] * len(courses))
+
+    assert [course["id"] for course in chosen] == [0, 1]
@@ -0,0 +1,40 @@
+import numpy as np
+
+from app.services.selection_cache import SelectionCache
+
+PROFILE = ("Data Science", "beginner", "python, pandas", 40, 0)
+
+
+def test_exact_key_ignores_case_whitespace_and_candidate_order():
+    """Тот же профиль и набор кандидатов в другом порядке попадает в точный кэш"""
+    cache = SelectionCache(maxsize=10, ttl=60)
+    cache.set(*PROFILE, [3, 1, 2], [2, 1])
+
+    assert cache.get("data  science", "Beginner", "python, pandas ", 40, 0, [1, 2, 3]) == [2, 1]
+    assert cache.get(*PROFILE, [1, 2, 3, 4]) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_semantic_tier_requires_close_query_and_same_constraints():
+    """Близкий запрос с теми же ограничениями переиспользует ответ, если его курсы есть среди кандидатов"""
+    cache = SelectionCache(maxsize=10, ttl=60, similarity=0.95)
+    cache.set(*PROFILE, [1, 2, 3], [2, 1], vector=np.array([1.0, 0.0]))
+    close = np.array([1.0, 0.1])
+
+    assert cache.get("Data Science", "beginner", "pandas", 40, 0, [1, 2, 5], vector=close) == [2, 1]
+    assert cache.get("Data Science", "beginner", "pandas", 40, 100, [1, 2, 5], vector=close) is None
+    assert cache.get("Data Science", "beginner", "pandas", 40, 0, [1, 5], vector=close) is None
+    assert cache.get("Data Science", "beginner", "pandas", 40, 0, [1, 2], vector=np.array([0.0, 1.0])) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_entries_survive_restart_through_disk(tmp_path):
+    """Записи сохраняются на диск и загружаются новым экземпляром"""
+    cache = SelectionCache(maxsize=10, ttl=60, similarity=0.95, directory=str(tmp_path))
+    cache.set(*PROFILE, [1, 2, 3], [3], vector=np.array([0.0, 1.0]))
+    cache.flush()
+
+    restored = SelectionCache(maxsize=10, ttl=60, similarity=0.95, directory=str(tmp_path))
+    restored.load()
+    assert restored.get(*PROFILE, [1, 2, 3]) == [3]
+    assert restored.get("ml", "beginner", "python", 40, 0, [3], vector=np.array([0.0, 2.0])) == [3]
@@ -0,0 +1,21 @@
+import pytest
+from httpx import MockTransport, Request, Response
+
+from app.config import settings
+from app.services.stepik import StepikClient
+
+
+@pytest.mark.asyncio
+async def test_get_json_retries_on_429_and_5xx(monkeypatch):
+    monkeypatch.setattr(settings, "stepik_backoff_base", 0)
+    statuses = [429, 503, 200]
+
+    def handler(request: Request) -> Response:
+        return Response(statuses.pop(0), json={"users": [{"id": 1}]})
+
+    client = StepikClient()
+    await client.start(transport=MockTransport(handler))
+
+    assert await client.users([1]) == [{"id": 1}]
+    assert statuses == []
+    await client.close()
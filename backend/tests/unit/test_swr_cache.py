@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from app.utils.swr_cache import SWRCache
+
+
+@pytest.mark.asyncio
+async def test_swr_cache_serves_stale_value_and_refreshes_once():
+    calls = []
+    release = asyncio.Event()
+
+    async def loader():
+        calls.append(len(calls))
+        if len(calls) > 1:
+            await release.wait()
+        return len(calls)
+
+    cache = SWRCache("test", loader, max_age=0, refresh_interval=60)
+    assert await cache.get() == 1
+
+    # The value is stale: every request is served from memory while a single refresh runs
+    assert await asyncio.gather(cache.get(), cache.get(), cache.get()) == [1, 1, 1]
+    assert len(calls) == 2
+
+    release.set()
+    assert await cache.refresh() == 2
+    assert cache.stats()["refreshes"] == 2
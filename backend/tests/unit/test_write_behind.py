@@ -0,0 +1,85 @@
+import asyncio
+from functools import partial
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.models.roadmap import Dialog, Message
+from app.services.chat_service import add_message
+from app.services.write_behind import WriteBehindQueue
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def dialogs(sessions):
+    async with sessions() as session:
+        session.add_all([Dialog(id=1, name="My way", owner=1), Dialog(id=2, name="My way", owner=1)])
+        await session.commit()
+
+
+async def messages(sessions, dialog_id):
+    async with sessions() as session:
+        result = await session.execute(select(Message.text).filter(Message.dialog_id == dialog_id).order_by(Message.id))
+        return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_writes_are_batched_in_order(sessions):
+    """
+    Записи сохраняются пакетами и в порядке отправки внутри каждого диалога.
+    """
+    queue = WriteBehindQueue(maxsize=100, batch_size=10, session_factory=sessions)
+    queue.start()
+    for i in range(25):
+        await queue.submit(partial(add_message, dialog_id=1 + i % 2, text=str(i)))
+    await queue.stop()
+
+    assert await messages(sessions, 1) == [str(i) for i in range(0, 25, 2)]
+    assert await messages(sessions, 2) == [str(i) for i in range(1, 25, 2)]
+    stats = queue.stats()
+    assert stats["written"] == 25 and stats["failed"] == 0
+    assert stats["batches"] < 25
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_lose_batch(sessions):
+    """
+    Ошибка одной записи не мешает сохранить остальные записи пакета.
+    """
+    async def broken(session):
+        raise RuntimeError("broken write")
+
+    queue = WriteBehindQueue(maxsize=100, batch_size=10, session_factory=sessions)
+    queue.start()
+    await queue.submit(partial(add_message, dialog_id=1, text="first"))
+    await queue.submit(broken)
+    await queue.submit(partial(add_message, dialog_id=1, text="second"))
+    await queue.stop()
+
+    assert await messages(sessions, 1) == ["first", "second"]
+    assert queue.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_waits_when_queue_is_full(sessions):
+    """
+    При заполненной очереди submit ждёт освобождения места.
+    """
+    release = asyncio.Event()
+
+    async def slow(session):
+        await release.wait()
+
+    queue = WriteBehindQueue(maxsize=1, batch_size=1, session_factory=sessions)
+    queue.start()
+    await queue.submit(slow)
+    await asyncio.sleep(0)  # The worker takes the first job
+    await queue.submit(slow)
+    blocked = asyncio.create_task(queue.submit(slow))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+
+    release.set()
+    await asyncio.wait_for(blocked, 1)
+    await queue.stop()
+    assert queue.stats()["written"] == 3